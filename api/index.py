@@ -1,22 +1,68 @@
 """Vercel Python Function entrypoint - Full orchestration version."""
 
+import asyncio
+import json
 import os
 import sys
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import List
 
 # orchestrationモジュールのパスを追加
 api_dir = Path(__file__).parent
 project_root = api_dir.parent
 sys.path.insert(0, str(project_root))
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+# orjson があればレスポンスのJSON化に使う（stdlib json より高速）
+try:
+    import orjson
+except ImportError:  # 任意依存
+    orjson = None
+
+
+class OrjsonResponse(JSONResponse):
+    """orjson でシリアライズする JSONResponse"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+DefaultJSONResponse = OrjsonResponse if orjson else JSONResponse
+
 # Vercel環境フラグ
 IS_VERCEL = os.getenv("VERCEL") == "1"
 
-app = FastAPI(title="Observer-Actor Orchestration Bot", root_path="/api")
+# 同期ハンドラ(def)を実行するスレッドプールの上限（anyio 既定は40）
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "200"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from anyio import to_thread
+
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    # ストレージ初期化は起動時に1回だけ行い、リクエスト経路から外す
+    try:
+        from orchestration import ensure_storage_ready
+        ensure_storage_ready()
+    except Exception as e:
+        print(f"[API] ストレージ初期化エラー: {e}")
+    yield
+
+
+app = FastAPI(
+    title="Observer-Actor Orchestration Bot",
+    root_path="/api",
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
+)
 
 
 class ChatRequest(BaseModel):
@@ -28,10 +74,25 @@ class DryRunRequest(BaseModel):
     enabled: bool
 
 
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+
+
+# /chat/stream で応答待ちの間に送るコメント行の間隔（秒）
+SSE_KEEPALIVE_SEC = 5.0
+
+# バッチ実行ジョブ（メモリ内に保持し、上限を超えたら古いものから破棄）
+MAX_BATCH_JOBS = 100
+_batch_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+
 # ===== エンドポイント =====
+# メモリ内の値を読み書きするだけのエンドポイントは async def にして
+# スレッドプールを経由させない。LLM/DB I/O を伴う /chat, /reset, /state は
+# 同期処理のため def のまま（FastAPI がスレッドプールで実行する）。
 
 @app.get("/dryrun")
-def get_dryrun_status():
+async def get_dryrun_status():
     """DRY RUNモードの状態を取得"""
     try:
         from orchestration.settings import settings
@@ -41,7 +102,7 @@ def get_dryrun_status():
 
 
 @app.post("/dryrun")
-def set_dryrun(req: DryRunRequest):
+async def set_dryrun(req: DryRunRequest):
     """DRY RUNモードを設定"""
     try:
         from orchestration.settings import settings, enable_dry_run, disable_dry_run
@@ -54,28 +115,140 @@ def set_dryrun(req: DryRunRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/chat")
-def chat(req: ChatRequest):
-    """チャットエンドポイント（完全版）"""
-    try:
-        from orchestration import process_chat_turn, ensure_storage_ready
+def _run_chat_turn(user_id: str, message: str) -> dict:
+    """1ターン分のチャット処理を行い、レスポンス用のdictを返す"""
+    from orchestration import process_chat_turn
+
+    # チャット処理
+    result = process_chat_turn(user_id, message)
+
+    # 状態をdict化
+    state = result["state"]
+    if hasattr(state, "to_dict"):
+        state = state.to_dict()
+
+    return {"reply": result["reply"], "state": state}
 
-        # ストレージ初期化（初回のみ実行される）
-        ensure_storage_ready()
 
-        # チャット処理
-        result = process_chat_turn(req.user_id, req.message)
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events の1イベントを組み立てる"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        # 状態をdict化
-        state = result["state"]
-        if hasattr(state, "to_dict"):
-            state = state.to_dict()
 
-        return {"reply": result["reply"], "state": state}
+@app.post("/chat")
+def chat(req: ChatRequest):
+    """チャットエンドポイント（完全版）"""
+    from orchestration.session import session_manager
+
+    # 空メッセージはLLMやログを通さずに弾く
+    message = req.message.strip()
+    if not message:
+        raise HTTPException(status_code=400, detail="message is empty")
+
+    # 二重送信なら先行リクエストの結果をそのまま返す
+    session = session_manager.get_session(req.user_id)
+    claim, duplicate = session.claim_message(message)
+    if duplicate:
+        cached = session.wait_duplicate(claim)
+        if cached is not None:
+            return cached
+
+    response = None
+    try:
+        response = _run_chat_turn(req.user_id, message)
+        return response
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error: {e}")
+    finally:
+        if not duplicate:
+            session.finish_message(claim, response)
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """チャットエンドポイント（SSE版）
+
+    返信は Critic の検証後に確定するため、トークン単位ではなく
+    受付(start) → 返信(reply) / エラー(error) のイベントで返す。
+    待機中は keepalive コメントを送り、最初のバイトを即座に返す。
+    """
+    message = req.message.strip()
+    if not message:
+        raise HTTPException(status_code=400, detail="message is empty")
+
+    async def event_gen():
+        from starlette.concurrency import run_in_threadpool
+
+        yield _sse("start", {"user_id": req.user_id})
+        task = asyncio.ensure_future(run_in_threadpool(_run_chat_turn, req.user_id, message))
+        while not task.done():
+            done, _ = await asyncio.wait({task}, timeout=SSE_KEEPALIVE_SEC)
+            if not done:
+                yield ": keepalive\n\n"
+        try:
+            yield _sse("reply", task.result())
+        except Exception as e:
+            import traceback
+            traceback.print_exception(e)
+            yield _sse("error", {"detail": f"Error: {e}"})
+
+    return StreamingResponse(
+        event_gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _run_chat_batch(job: dict, items: List[ChatRequest]) -> None:
+    """バッチの各発話を順番に処理する（同一ユーザーの発話順を保つため逐次実行）"""
+    for i, item in enumerate(items):
+        custom_id = f"{item.user_id}-{i}"
+        try:
+            result = _run_chat_turn(item.user_id, item.message)
+            job["results"].append({"custom_id": custom_id, **result})
+            job["completed"] += 1
+        except Exception as e:
+            print(f"[Batch] {custom_id} 処理エラー: {e}")
+            job["results"].append({"custom_id": custom_id, "error": str(e)})
+            job["failed"] += 1
+    job["status"] = "completed"
+
+
+@app.post("/chat/batch")
+def chat_batch(req: BatchChatRequest, background_tasks: BackgroundTasks):
+    """複数の発話をまとめて投入し、バックグラウンドで処理する（リプレイ・回帰評価用）
+
+    結果は /chat/batch/{batch_id} をポーリングして取得する。
+    """
+    if not req.items:
+        raise HTTPException(status_code=400, detail="items is empty")
+
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    job = {
+        "batch_id": batch_id,
+        "status": "in_progress",
+        "total": len(req.items),
+        "completed": 0,
+        "failed": 0,
+        "results": [],
+    }
+    _batch_jobs[batch_id] = job
+    while len(_batch_jobs) > MAX_BATCH_JOBS:
+        _batch_jobs.popitem(last=False)
+
+    background_tasks.add_task(_run_chat_batch, job, req.items)
+    return {"batch_id": batch_id, "status": job["status"], "total": job["total"]}
+
+
+@app.get("/chat/batch/{batch_id}")
+async def get_chat_batch(batch_id: str):
+    """バッチの進捗と結果を取得"""
+    job = _batch_jobs.get(batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+    return {**job, "results": list(job["results"])}
 
 
 @app.post("/reset")
@@ -119,7 +292,7 @@ def get_state(user_id: str):
 
 
 @app.get("/logs")
-def get_logs(limit: int = 50):
+async def get_logs(limit: int = 50):
     """エージェントログを取得"""
     try:
         from orchestration.agent_logger import agent_logger
@@ -129,7 +302,7 @@ def get_logs(limit: int = 50):
 
 
 @app.get("/logs/{agent_name}")
-def get_agent_logs(agent_name: str, limit: int = 20):
+async def get_agent_logs(agent_name: str, limit: int = 20):
     """特定エージェントのログを取得"""
     try:
         from orchestration.agent_logger import agent_logger
@@ -139,7 +312,7 @@ def get_agent_logs(agent_name: str, limit: int = 20):
 
 
 @app.delete("/logs")
-def clear_logs():
+async def clear_logs():
     """ログをクリア"""
     try:
         from orchestration.agent_logger import agent_logger
@@ -24,9 +24,27 @@ create table if not exists public.mid_term_memory (
   summary text not null,
   importance double precision not null default 0.5,
   source_session_id uuid not null,
-  turn_range text not null,
+  turn_start int not null default 0,
+  turn_end int not null default 0,
   created_at timestamp with time zone default now()
 );
+-- 旧スキーマ（turn_range text, 例: "[1,15]"）からの移行。ターン範囲は整数列で持ち、アプリ側で文字列をパースしない
+alter table public.mid_term_memory add column if not exists turn_start int not null default 0;
+alter table public.mid_term_memory add column if not exists turn_end int not null default 0;
+do $$
+begin
+  if exists (
+    select 1 from information_schema.columns
+    where table_schema = 'public' and table_name = 'mid_term_memory' and column_name = 'turn_range'
+  ) then
+    update public.mid_term_memory
+    set turn_start = (regexp_match(turn_range, '(\d+)\s*,\s*(\d+)'))[1]::int,
+        turn_end = (regexp_match(turn_range, '(\d+)\s*,\s*(\d+)'))[2]::int
+    where turn_range ~ '\d+\s*,\s*\d+';
+    -- 旧列は残すが、新しい行では書き込まないので NOT NULL を外す
+    alter table public.mid_term_memory alter column turn_range drop not null;
+  end if;
+end $$;
 create index if not exists idx_mtm_user on public.mid_term_memory (user_id);
 create index if not exists idx_mtm_importance on public.mid_term_memory (importance desc);
 
@@ -39,15 +57,21 @@ create table if not exists public.long_term_memory (
   importance double precision not null default 0.5,
   source_mid_term_id uuid,
   embedding vector(1536),
+  -- 1次選別用の2値化ベクトル（1536bit = 192バイト。pgvector 0.7 以降の binary_quantize）
+  embedding_bit bit(1536) generated always as (binary_quantize(embedding)::bit(1536)) stored,
   created_at timestamp with time zone default now(),
   last_accessed_at timestamp with time zone default now()
 );
+alter table public.long_term_memory
+  add column if not exists embedding_bit bit(1536)
+  generated always as (binary_quantize(embedding)::bit(1536)) stored;
 create index if not exists idx_ltm_user on public.long_term_memory (user_id);
 create index if not exists idx_ltm_importance on public.long_term_memory (importance desc);
+create index if not exists idx_ltm_user_type_importance on public.long_term_memory (user_id, memory_type, importance desc);
 -- pgvector の近似検索インデックス（リスト数はデータ量に応じて調整）
 create index if not exists idx_ltm_embedding on public.long_term_memory using ivfflat (embedding vector_cosine_ops) with (lists = 100);
 
--- ベクトル検索用RPC
+-- ベクトル検索用RPC（2値化ベクトルで候補を選んでから float ベクトルで再ランク）
 create or replace function public.match_long_term_memory(
   query_embedding vector(1536),
   match_user_id text,
@@ -74,13 +98,130 @@ create or replace function public.match_long_term_memory(
     ltm.created_at,
     ltm.last_accessed_at,
     ltm.embedding <=> query_embedding as distance
-  from public.long_term_memory ltm
-  where ltm.user_id = match_user_id
-    and ltm.importance >= min_importance
-    and ltm.embedding is not null
+  from (
+    -- 1段目: 2値化ベクトルのハミング距離で候補を絞る（float の embedding は読まない）
+    select c.id
+    from public.long_term_memory c
+    where c.user_id = match_user_id
+      and c.importance >= min_importance
+      and c.embedding_bit is not null
+    order by c.embedding_bit <~> binary_quantize(query_embedding)::bit(1536)
+    limit greatest(match_count * 20, 200)
+  ) candidates
+  join public.long_term_memory ltm on ltm.id = candidates.id
+  -- 2段目: 候補だけを元の float ベクトルのコサイン距離で並べ直す
   order by ltm.embedding <=> query_embedding
   limit match_count;
 $$;
 
+-- アーカイブ済み長期記憶
+create table if not exists public.archived_memories (
+  id uuid primary key default gen_random_uuid(),
+  original_id uuid not null,
+  user_id text not null,
+  content text not null,
+  memory_type text not null default 'fact',
+  importance double precision not null,
+  original_created_at timestamp with time zone,
+  archived_at timestamp with time zone default now()
+);
+create index if not exists idx_am_user on public.archived_memories (user_id);
+
+-- 長期記憶の重要度を設定するRPC（値は 0.0〜1.0 に丸める。更新件数を返す）
+create or replace function public.set_long_term_memory_importance(
+  match_user_id text,
+  memory_id uuid,
+  new_importance float
+) returns int language sql as $$
+  with updated as (
+    update public.long_term_memory
+    set importance = least(1.0, greatest(0.0, new_importance))
+    where id = memory_id
+      and user_id = match_user_id
+    returning 1
+  )
+  select count(*)::int from updated;
+$$;
+
+-- 長期記憶のスコア減衰RPC（未アクセスの記憶を一括で減衰し、閾値未満は削除。件数を返す）
+-- 基準時刻はDB側の now() から求める（アプリ側のタイムゾーンに依存しない）
+drop function if exists public.decay_long_term_memory(text, timestamp with time zone, float, float);
+create or replace function public.decay_long_term_memory(
+  match_user_id text,
+  decay_days int default 30,
+  decay_amount float default 0.1,
+  min_importance float default 0.1
+) returns int language sql as $$
+  with targets as (
+    select id, importance - decay_amount as new_importance
+    from public.long_term_memory
+    where user_id = match_user_id
+      and last_accessed_at < now() - make_interval(days => decay_days)
+  ), deleted as (
+    delete from public.long_term_memory ltm
+    using targets t
+    where ltm.id = t.id
+      and t.new_importance < min_importance
+    returning 1
+  ), updated as (
+    update public.long_term_memory ltm
+    set importance = t.new_importance
+    from targets t
+    where ltm.id = t.id
+      and t.new_importance >= min_importance
+    returning 1
+  )
+  select ((select count(*) from deleted) + (select count(*) from updated))::int;
+$$;
+
+-- 低重要度の長期記憶をアーカイブするRPC（移動と削除を1文で行い、件数を返す）
+create or replace function public.archive_long_term_memory(
+  match_user_id text,
+  threshold float default 0.1
+) returns int language sql as $$
+  with moved as (
+    delete from public.long_term_memory
+    where user_id = match_user_id
+      and importance < threshold
+    returning id, user_id, content, memory_type, importance, created_at
+  ), archived as (
+    insert into public.archived_memories
+      (original_id, user_id, content, memory_type, importance, original_created_at)
+    select id, user_id, content, memory_type, importance, created_at
+    from moved
+    returning 1
+  )
+  select count(*)::int from archived;
+$$;
+
+-- 要約コンテキスト用RPC（直近の中期記憶と、種類別の重要な長期記憶を1回で返す）
+create or replace function public.get_memory_summary_context(
+  match_user_id text,
+  summary_count int default 3,
+  fact_count int default 5,
+  emotion_count int default 3
+) returns table (
+  bucket text,
+  content text
+) language sql stable as $$
+  (select 'mid_recent', summary
+   from public.mid_term_memory
+   where user_id = match_user_id
+   order by created_at desc
+   limit summary_count)
+  union all
+  (select 'fact', content
+   from public.long_term_memory
+   where user_id = match_user_id and memory_type = 'fact'
+   order by importance desc
+   limit fact_count)
+  union all
+  (select 'emotion', content
+   from public.long_term_memory
+   where user_id = match_user_id and memory_type = 'emotion'
+   order by importance desc
+   limit emotion_count);
+$$;
+
 -- ※PostgreSQLでは SELECT トリガーが使えないためアクセス時刻更新はコード側で行う
 -- 必要ならアプリ側で UPDATE を発行するか、別途適切なイベント（INSERT/UPDATE）でトリガーを作成してください。
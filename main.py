@@ -1,9 +1,15 @@
-"""CLI と（依存があれば）FastAPI エンドポイントを提供するエントリ。"""
+"""CLI と（依存があれば）FastAPI エンドポイントを提供するエントリ。
+
+HTTP エンドポイントは api/index.py の app を /api にマウントして共有し、
+ここではローカル起動用の UI 配信だけを追加する。
+"""
 from __future__ import annotations
 
 import argparse
 import os
 import sys
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Optional
 from pathlib import Path
 
@@ -14,106 +20,38 @@ try:
     from fastapi import FastAPI
     from fastapi.responses import HTMLResponse
     from fastapi.staticfiles import StaticFiles
-    from pydantic import BaseModel
+    from api.index import app as api_app
 except Exception:  # ImportError 以外も安全側で握り潰す
     FastAPI = None  # type: ignore
-    BaseModel = object  # type: ignore
 
 app: Optional["FastAPI"] = None
 
 
 if FastAPI:
 
-    # Vercel では自動で環境変数 VERCEL=1 が入る。ローカルでは空。
-    ROOT_PATH = "/api" if os.getenv("VERCEL") else os.getenv("ROOT_PATH", "")
-
-    class ChatRequest(BaseModel):
-        user_id: str
-        message: str
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # マウントしたアプリの lifespan は自動では走らないため明示的に実行する
+        async with api_app.router.lifespan_context(api_app):
+            yield
 
-    class DryRunRequest(BaseModel):
-        enabled: bool
-
-    app = FastAPI(title="Observer-Actor Orchestration Bot", root_path=ROOT_PATH)
+    # UI と同じく /api 配下で API を提供する（Vercel の構成と揃える）
+    app = FastAPI(title="Observer-Actor Orchestration Bot (local)", lifespan=lifespan)
+    app.mount("/api", api_app)
     app.mount("/static", StaticFiles(directory="ui"), name="static")
 
-    # ログ取得エンドポイント
-    @app.get("/logs")
-    def get_logs(limit: int = 50):
-        """エージェントログを取得"""
-        from orchestration.agent_logger import agent_logger
-        return {"logs": agent_logger.get_recent_logs(limit)}
-
-    @app.get("/logs/{agent_name}")
-    def get_agent_logs(agent_name: str, limit: int = 20):
-        """特定エージェントのログを取得"""
-        from orchestration.agent_logger import agent_logger
-        return {"logs": agent_logger.get_logs_by_agent(agent_name, limit)}
-
-    @app.delete("/logs")
-    def clear_logs():
-        """ログをクリア"""
-        from orchestration.agent_logger import agent_logger
-        agent_logger.clear_logs()
-        return {"status": "ok", "message": "Logs cleared"}
-
-    # DRY RUNモード制御
-    @app.get("/dryrun")
-    def get_dryrun_status():
-        """DRY RUNモードの状態を取得"""
-        from orchestration.settings import settings
-        return {"dry_run": settings.dry_run}
-
-    @app.post("/dryrun")
-    def set_dryrun(req: DryRunRequest):
-        """DRY RUNモードを設定"""
-        from orchestration.settings import settings, enable_dry_run, disable_dry_run
-        if req.enabled:
-            enable_dry_run()
-        else:
-            disable_dry_run()
-        return {"dry_run": settings.dry_run}
-
-    @app.post("/chat")
-    def chat(req: ChatRequest):
-        try:
-            result = process_chat_turn(req.user_id, req.message)
-            state = result["state"].to_dict()
-            return {"reply": result["reply"], "state": state}
-        except Exception as e:
-            from fastapi import HTTPException
-            raise HTTPException(status_code=500, detail=f"LLMエラー: {e}")
-
-    @app.post("/reset")
-    def reset(req: ChatRequest):
-        from orchestration.orchestrator import reset_session
-        try:
-            reset_session(req.user_id)
-            return {"status": "ok", "message": "Session reset complete."}
-        except Exception as e:
-            from fastapi import HTTPException
-            raise HTTPException(status_code=500, detail=f"Reset Error: {e}")
-
-    @app.get("/state/{user_id}")
-    def get_state(user_id: str):
-        from orchestration.storage import fetch_state
-        from orchestration.session import session_manager
-
-        state = fetch_state(user_id)
-        session = session_manager.get_session(user_id)
-        history = session.get_history(limit=20)
-        return {
-            "state": state.to_dict() if state else None,
-            "history": history,
-        }
-
-    @app.get("/", response_class=HTMLResponse)
-    def ui_root():
+    @lru_cache(maxsize=1)
+    def load_ui_html() -> str:
+        """UI の HTML を読み込む（プロセス内で1回だけ）"""
         index_path = Path("ui/index.html")
         if index_path.exists():
-            return index_path.read_text(encoding="utf-8")
+            return index_path.read_bytes().decode("utf-8")
         return "<h1>UIファイルが見つかりません</h1>"
 
+    @app.get("/", response_class=HTMLResponse)
+    def ui_root():
+        return load_ui_html()
+
 
 def run_cli(user_id: str) -> None:
     ensure_storage_ready()
@@ -154,10 +92,13 @@ def main(argv=None) -> None:
         try:
             import uvicorn
         except Exception:
-            print("uvicorn が見つかりません。`pip install uvicorn` を実行してください。")
+            print("uvicorn が見つかりません。`pip install \"uvicorn[standard]\"` を実行してください。")
             sys.exit(1)
-        ensure_storage_ready()
-        uvicorn.run("main:app", host="0.0.0.0", port=8005, reload=False)
+        # uvicorn[standard] が入っていれば uvloop / httptools が自動で選択される。
+        # セッション・ログ・DRY RUN 設定はプロセス内に保持しているため、
+        # ワーカー数は既定1（WEB_CONCURRENCY で明示した場合のみ増やす）。
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        uvicorn.run("main:app", host="0.0.0.0", port=8005, reload=False, workers=workers)
     else:
         run_cli(args.user)
 
@@ -1,25 +1,54 @@
-"""オーケストレーションBot パッケージ。"""
+"""オーケストレーションBot パッケージ。
+
+`import orchestration` 自体を軽くするため、公開属性は初回アクセス時に
+サブモジュールから読み込む（PEP 562 の __getattr__）。
+"""
 
 import os
+from importlib import import_module
+
+# 公開名 -> 定義元サブモジュール
+_LAZY_ATTRS = {
+    "process_chat_turn": ".orchestrator",
+    "ensure_storage_ready": ".orchestrator",
+    "UtteranceClassifier": ".utterance_classifier",
+    "UtteranceCategory": ".utterance_classifier",
+    "utterance_classifier": ".utterance_classifier",
+    "UtteranceClassification": ".models",
+    "memory_system": ".memory.vector_store",
+    "MemoryItem": ".memory.vector_store",
+}
+
+# ChromaDBを使う属性（Vercel環境や未インストール時は None）
+_CHROMA_ATTRS = ("memory_system", "MemoryItem")
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    if name in _CHROMA_ATTRS:
+        # ChromaDBはVercel環境では使用しない
+        module = None
+        if not os.getenv("VERCEL"):
+            try:
+                module = import_module(module_name, __name__)
+            except Exception:
+                pass  # ChromaDBが使えない環境では無視
+        values = {attr: getattr(module, attr, None) for attr in _CHROMA_ATTRS}
+    else:
+        module = import_module(module_name, __name__)
+        values = {
+            attr: getattr(module, attr)
+            for attr, mod in _LAZY_ATTRS.items()
+            if mod == module_name
+        }
+
+    # 次回以降は通常の属性アクセスになるようキャッシュする
+    globals().update(values)
+    return values[name]
 
-from .orchestrator import process_chat_turn, ensure_storage_ready
-from .utterance_classifier import (
-    UtteranceClassifier,
-    UtteranceCategory,
-    utterance_classifier,
-)
-from .models import UtteranceClassification
-
-# ChromaDBはVercel環境では使用しない（遅延インポート）
-memory_system = None
-MemoryItem = None
-
-# Vercel以外の環境でのみChromaDBをインポート
-if not os.getenv("VERCEL"):
-    try:
-        from .memory.vector_store import memory_system, MemoryItem
-    except Exception:
-        pass  # ChromaDBが使えない環境では無視
 
 __all__ = [
     "process_chat_turn",
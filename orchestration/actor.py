@@ -5,7 +5,8 @@ LLM が利用可能なら生成系を使用し、未設定ならテンプレー
 from __future__ import annotations
 
 import random
-from typing import List, Optional
+from itertools import product
+from typing import Dict, List, Optional, Tuple
 
 from .models import UserState, EmotionState
 from .llm_client import llm_client
@@ -22,25 +23,33 @@ DEFAULT_ACTOR_SYSTEM_PROMPT = (
 )
 
 
-def _tone_from_emotion(emo: EmotionState) -> str:
-    # PADモデルに基づく演技指針の生成
-    tone = []
-    if emo.pleasure >= 5.0:
-        tone.append("明るく楽しげに")
-    elif emo.pleasure <= -5.0:
-        tone.append("不機嫌に、冷たく")
-    
-    if emo.arousal >= 5.0:
-        tone.append("テンション高く")
-    elif emo.arousal <= -5.0:
-        tone.append("落ち着いて、あるいは眠げに")
-        
-    if emo.dominance >= 5.0:
-        tone.append("自信満々に")
-    elif emo.dominance <= -5.0:
-        tone.append("控えめに、おどおどと")
-        
-    return "、".join(tone) if tone else "自然体で"
+# PAD各軸の演技指針（バケット -1: <= -5.0, 0: 中間, 1: >= 5.0）
+_TONE_WORDS = (
+    {1: "明るく楽しげに", -1: "不機嫌に、冷たく"},            # pleasure
+    {1: "テンション高く", -1: "落ち着いて、あるいは眠げに"},  # arousal
+    {1: "自信満々に", -1: "控えめに、おどおどと"},            # dominance
+)
+
+
+def _build_tone_table() -> Dict[Tuple[int, int, int], str]:
+    """27通りのバケットの組み合わせすべてについて演技指針を事前に組み立てる"""
+    table = {}
+    for key in product((-1, 0, 1), repeat=3):
+        tone = [words[b] for words, b in zip(_TONE_WORDS, key) if b]
+        table[key] = "、".join(tone) if tone else "自然体で"
+    return table
+
+
+_TONE_TABLE = _build_tone_table()
+
+
+def _pad_bucket(value: float) -> int:
+    return 1 if value >= 5.0 else (-1 if value <= -5.0 else 0)
+
+
+def tone_from_emotion(emo: EmotionState) -> str:
+    """PADモデルに基づく演技指針を返す（PromptBuilder・ActorModel からも使う）"""
+    return _TONE_TABLE[(_pad_bucket(emo.pleasure), _pad_bucket(emo.arousal), _pad_bucket(emo.dominance))]
 
 
 def generate_reply(
@@ -110,7 +119,7 @@ def _generate_reply_llm(
     
     # メモリをテキスト化
     memory_text = "\n".join([f"- {m}" for m in memories]) if memories else "特になし"
-    tone_instruction = _tone_from_emotion(state.emotion)
+    tone_instruction = tone_from_emotion(state.emotion)
     
     messages = [
         {"role": "system", "content": system_prompt},
@@ -5,19 +5,81 @@
 """
 from __future__ import annotations
 
+import atexit
 import json
+import queue
+import sys
 import time
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
-from collections import deque
+from collections import defaultdict, deque
 import threading
 
+try:
+    import orjson
+except ImportError:  # 任意依存。無ければ標準の json を使う
+    orjson = None
 
-@dataclass
+
+@lru_cache(maxsize=512)
+def _iso_from_ms(ts_ms: int) -> str:
+    """エポックミリ秒をISO8601(UTC)文字列に変換（同じミリ秒の整形結果は使い回す）"""
+    return datetime.utcfromtimestamp(ts_ms / 1000).isoformat(timespec="milliseconds") + "Z"
+
+
+def _iso_from_ns(ts_ns: int) -> str:
+    """エポックナノ秒をISO8601(UTC)文字列に変換"""
+    return _iso_from_ms(ts_ns // 1_000_000)
+
+
+def _elapsed_ms(start_ns: int, end_ns: int) -> float:
+    """ナノ秒の差分をミリ秒（小数2桁）に変換"""
+    return (end_ns - start_ns) // 10_000 / 100
+
+
+# orjson と同じ区切り（空白なし）にして、辞書の大きさで出力形式が変わらないようにする
+_summary_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+# このキー数未満のdictは orjson で一括変換する（C実装で十分速い）
+_ORJSON_MAX_KEYS = 20
+
+
+def _dumps_head(data: Any, max_len: int) -> str:
+    """JSON文字列の先頭 max_len 文字だけを生成する（巨大なdictでも全体を直列化しない）"""
+    if orjson is not None and len(data) < _ORJSON_MAX_KEYS:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)[:max_len * 4].decode("utf-8", "ignore")[:max_len]
+        except TypeError:
+            pass  # 直列化できない値を含む場合は標準の json に任せる
+
+    chunks = []
+    size = 0
+    for chunk in _summary_encoder.iterencode(data):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_len:
+            break
+    return "".join(chunks)[:max_len]
+
+
+# 開始ログを保持する上限時間（これを過ぎた処理中ログは破棄）
+INFLIGHT_TTL_NS = 300 * 1_000_000_000
+
+# コンソール出力のフォーマット（整形はバックグラウンドの書き出しスレッドで行う）
+_CONSOLE_FORMATS = {
+    "start": "[{0}] 開始 | モデル: {1} | Provider: {2}\n  入力: {3}...\n",
+    "end": "[{0}] 完了 | 所要時間: {1:.0f}ms\n  出力: {2}...\n",
+    "error": "[{0}] エラー | 所要時間: {1:.0f}ms\n  エラー: {2}\n",
+}
+
+
+@dataclass(slots=True)
 class AgentLog:
     """個々のエージェントログエントリ"""
-    timestamp: str
+    created_ns: int  # エポックns（壁時計）。ISO文字列への変換は読み出し時に行う
     agent_name: str  # "observer", "actor", "critic"
     action: str  # "start", "end", "error"
     duration_ms: Optional[float] = None
@@ -27,33 +89,52 @@ class AgentLog:
     provider: Optional[str] = None
     error: Optional[str] = None
     details: Dict[str, Any] = field(default_factory=dict)
+    # 所要時間の計算専用の単調時計(perf_counter_ns)。時刻合わせの影響を受けない
+    perf_ns: int = field(default=0, repr=False)
+
+    @property
+    def timestamp(self) -> str:
+        return _iso_from_ns(self.created_ns)
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # asdict は details まで再帰的にコピーするため、フィールドを直接並べる
+        return {
+            "timestamp": self.timestamp,
+            "agent_name": self.agent_name,
+            "action": self.action,
+            "duration_ms": self.duration_ms,
+            "input_summary": self.input_summary,
+            "output_summary": self.output_summary,
+            "model": self.model,
+            "provider": self.provider,
+            "error": self.error,
+            "details": self.details,
+        }
+
+
+def _tail_dicts(logs: deque, limit: int) -> List[Dict[str, Any]]:
+    """deque の末尾 limit 件を古い順の dict で返す"""
+    if limit <= 0:
+        return []
+    # チャットスレッドが追記し続けるため、list() で一括して写し取ってから dict に変換する
+    # （deque を直接辿ると "deque mutated during iteration" になる）
+    return [log.to_dict() for log in list(logs)[-limit:]]
 
 
 class AgentLogger:
-    """エージェントログの管理クラス（シングルトン）"""
-
-    _instance = None
-    _lock = threading.Lock()
-
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+    """エージェントログの管理クラス（モジュール末尾の agent_logger を共有して使う）"""
 
     def __init__(self, max_logs: int = 100):
-        if self._initialized:
-            return
-        self._initialized = True
+        self._lock = threading.Lock()
         self.logs: deque = deque(maxlen=max_logs)
+        # エージェント名ごとの索引（/logs/{agent_name} を線形走査しないため）
+        self._logs_by_agent: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_logs))
+        # 処理中エージェントの開始ログ（所要時間の計算にも使う）
         self._current_turn: Dict[str, AgentLog] = {}
-        self._turn_start_times: Dict[str, float] = {}
         self._console_output = True  # コンソール出力フラグ
+        # コンソール出力はキューに積み、書き出しスレッドでまとめて処理する
+        self._console_queue: queue.Queue = queue.Queue()
+        self._console_thread: Optional[threading.Thread] = None
 
     def enable_console(self, enabled: bool = True):
         """コンソール出力を有効/無効にする"""
@@ -67,24 +148,28 @@ class AgentLogger:
         provider: Optional[str] = None
     ):
         """エージェント処理開始のログ"""
-        self._turn_start_times[agent_name] = time.time()
+        created_ns = time.time_ns()
+        perf_ns = time.perf_counter_ns()
+        self._prune_inflight(perf_ns)
 
         # 入力のサマリー作成
         input_summary = self._summarize(input_data, max_len=200)
 
+        # 開始ログは保持されないため時刻の整形は行わない。
+        # 終了時は perf_ns から所要時間を求める。
         log = AgentLog(
-            timestamp=datetime.utcnow().isoformat() + "Z",
+            created_ns=created_ns,
             agent_name=agent_name,
             action="start",
             input_summary=input_summary,
             model=model,
             provider=provider,
+            perf_ns=perf_ns,
         )
         self._current_turn[agent_name] = log
 
         if self._console_output:
-            print(f"[{agent_name.upper()}] 開始 | モデル: {model} | Provider: {provider}")
-            print(f"  入力: {input_summary[:100]}...")
+            self._emit("start", agent_name, model, provider, input_summary[:100])
 
     def end_agent(
         self,
@@ -93,36 +178,25 @@ class AgentLogger:
         details: Optional[Dict[str, Any]] = None
     ):
         """エージェント処理完了のログ"""
-        start_time = self._turn_start_times.get(agent_name, time.time())
-        duration_ms = (time.time() - start_time) * 1000
+        created_ns = time.time_ns()
+        perf_ns = time.perf_counter_ns()
+        start_log = self._current_turn.pop(agent_name, None)
 
         output_summary = self._summarize(output_data, max_len=300)
 
         log = AgentLog(
-            timestamp=datetime.utcnow().isoformat() + "Z",
+            created_ns=created_ns,
             agent_name=agent_name,
             action="end",
-            duration_ms=round(duration_ms, 2),
             output_summary=output_summary,
             details=details or {},
+            perf_ns=perf_ns,
         )
-
-        # 開始ログの情報を引き継ぐ
-        if agent_name in self._current_turn:
-            start_log = self._current_turn[agent_name]
-            log.input_summary = start_log.input_summary
-            log.model = start_log.model
-            log.provider = start_log.provider
-
-        self.logs.append(log)
+        self._inherit_start(log, start_log)
+        self._append(log)
 
         if self._console_output:
-            print(f"[{agent_name.upper()}] 完了 | 所要時間: {duration_ms:.0f}ms")
-            print(f"  出力: {output_summary[:100]}...")
-
-        # クリーンアップ
-        self._current_turn.pop(agent_name, None)
-        self._turn_start_times.pop(agent_name, None)
+            self._emit("end", agent_name, log.duration_ms, output_summary[:100])
 
     def error_agent(
         self,
@@ -131,65 +205,147 @@ class AgentLogger:
         details: Optional[Dict[str, Any]] = None
     ):
         """エージェントエラーのログ"""
-        start_time = self._turn_start_times.get(agent_name, time.time())
-        duration_ms = (time.time() - start_time) * 1000
+        created_ns = time.time_ns()
+        perf_ns = time.perf_counter_ns()
+        start_log = self._current_turn.pop(agent_name, None)
 
         log = AgentLog(
-            timestamp=datetime.utcnow().isoformat() + "Z",
+            created_ns=created_ns,
             agent_name=agent_name,
             action="error",
-            duration_ms=round(duration_ms, 2),
             error=f"{type(error).__name__}: {str(error)}",
             details=details or {},
+            perf_ns=perf_ns,
         )
-
-        if agent_name in self._current_turn:
-            start_log = self._current_turn[agent_name]
-            log.input_summary = start_log.input_summary
-            log.model = start_log.model
-            log.provider = start_log.provider
-
-        self.logs.append(log)
+        self._inherit_start(log, start_log)
+        self._append(log)
 
         if self._console_output:
-            print(f"[{agent_name.upper()}] エラー | 所要時間: {duration_ms:.0f}ms")
-            print(f"  エラー: {log.error}")
+            self._emit("error", agent_name, log.duration_ms, log.error)
 
-        self._current_turn.pop(agent_name, None)
-        self._turn_start_times.pop(agent_name, None)
+    @staticmethod
+    def _inherit_start(log: AgentLog, start_log: Optional[AgentLog]):
+        """開始ログの情報（入力・モデル・所要時間）を引き継ぐ"""
+        if start_log is None:
+            log.duration_ms = 0.0
+            return
+        log.duration_ms = _elapsed_ms(start_log.perf_ns, log.perf_ns)
+        log.input_summary = start_log.input_summary
+        log.model = start_log.model
+        log.provider = start_log.provider
+
+    def _prune_inflight(self, now_perf_ns: int):
+        """終了ログが来ないまま残った開始ログを破棄する（例外経路でのリーク対策）"""
+        expired = now_perf_ns - INFLIGHT_TTL_NS
+        # 他のリクエストスレッドが同時に追加・削除するため、list() で先に写し取ってから走査する
+        for name, log in list(self._current_turn.items()):
+            if log.perf_ns < expired and self._current_turn.get(name) is log:
+                self._current_turn.pop(name, None)
+
+    def _emit(self, kind: str, agent_name: str, *args: Any):
+        """コンソール出力をキューに積む（整形・書き出しはリクエストスレッドで行わない）"""
+        self._console_queue.put((kind, agent_name, args))
+        if self._console_thread is None:
+            with self._lock:
+                if self._console_thread is None:
+                    self._console_thread = threading.Thread(
+                        target=self._console_worker, name="agent-logger-console", daemon=True
+                    )
+                    self._console_thread.start()
+
+    def _console_worker(self):
+        """キューに溜まったコンソール出力を書き出す"""
+        while True:
+            # 溜まっている分をまとめて整形し、1回の write で書き出す
+            items = [self._console_queue.get()]
+            while True:
+                try:
+                    items.append(self._console_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                chunks = []
+                for kind, agent_name, args in items:
+                    try:
+                        chunks.append(_CONSOLE_FORMATS[kind].format(agent_name.upper(), *args))
+                    except Exception as e:
+                        chunks.append(f"[AgentLogger] コンソール出力エラー: {e}\n")
+                sys.stdout.write("".join(chunks))
+                sys.stdout.flush()
+            except Exception as e:
+                print(f"[AgentLogger] コンソール出力エラー: {e}")
+            finally:
+                for _ in items:
+                    self._console_queue.task_done()
+
+    def flush(self):
+        """未出力のコンソールログをすべて書き出すまで待つ"""
+        if self._console_thread is not None:
+            self._console_queue.join()
+
+    def _append(self, log: AgentLog):
+        """ログを全体とエージェント別索引の両方に追加"""
+        self.logs.append(log)
+        self._logs_by_agent[log.agent_name].append(log)
 
     def get_recent_logs(self, limit: int = 20) -> List[Dict[str, Any]]:
         """最近のログを取得"""
-        logs_list = list(self.logs)
-        return [log.to_dict() for log in logs_list[-limit:]]
+        return _tail_dicts(self.logs, limit)
 
     def get_logs_by_agent(self, agent_name: str, limit: int = 10) -> List[Dict[str, Any]]:
         """特定エージェントのログを取得"""
-        filtered = [log for log in self.logs if log.agent_name == agent_name]
-        return [log.to_dict() for log in filtered[-limit:]]
+        agent_logs = self._logs_by_agent.get(agent_name)
+        if not agent_logs:
+            return []
+        return _tail_dicts(agent_logs, limit)
 
     def clear_logs(self):
         """ログをクリア"""
         self.logs.clear()
+        self._logs_by_agent.clear()
         self._current_turn.clear()
-        self._turn_start_times.clear()
 
     def _summarize(self, data: Any, max_len: int = 200) -> str:
         """データのサマリーを生成"""
         if data is None:
             return "None"
-        if isinstance(data, str):
-            return data[:max_len]
-        if isinstance(data, dict):
-            try:
-                json_str = json.dumps(data, ensure_ascii=False)
-                return json_str[:max_len]
-            except:
-                return str(data)[:max_len]
-        if isinstance(data, list):
-            return f"[{len(data)} items]"
+        summarizer = _SUMMARIZERS.get(type(data))
+        if summarizer is None:
+            # str/dict/list のサブクラスは isinstance で拾う（稀なので後回し）
+            summarizer = next(
+                (fn for typ, fn in _SUMMARIZERS.items() if isinstance(data, typ)),
+                _summarize_other,
+            )
+        return summarizer(data, max_len)
+
+
+def _summarize_str(data: str, max_len: int) -> str:
+    return data if len(data) <= max_len else data[:max_len]
+
+
+def _summarize_dict(data: dict, max_len: int) -> str:
+    try:
+        return _dumps_head(data, max_len)
+    except:
         return str(data)[:max_len]
 
 
+def _summarize_list(data: list, max_len: int) -> str:
+    return f"[{len(data)} items]"
+
+
+def _summarize_other(data: Any, max_len: int) -> str:
+    return str(data)[:max_len]
+
+
+# 型 -> サマリー関数（isinstance を順に試す代わりに type() で一発で引く）
+_SUMMARIZERS = {
+    str: _summarize_str,
+    dict: _summarize_dict,
+    list: _summarize_list,
+}
+
+
 # グローバルインスタンス
 agent_logger = AgentLogger()
+atexit.register(agent_logger.flush)
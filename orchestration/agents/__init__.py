@@ -1,6 +1,23 @@
-"""エージェントモジュール"""
-from .observer_agent import ObserverAgent
-from .actor_model import ActorModel
+"""エージェントモジュール
+
+各エージェントは初回アクセス時に読み込む（LLMクライアント等の依存を遅延させる）。
+"""
+from importlib import import_module
+
+_LAZY_ATTRS = {
+    "ObserverAgent": ".observer_agent",
+    "ActorModel": ".actor_model",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "ObserverAgent",
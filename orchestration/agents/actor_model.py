@@ -2,8 +2,8 @@
 from __future__ import annotations
 from typing import List, Dict, Optional
 
-from ..models import UserState, EmotionState
-from ..actor import generate_reply as _generate_reply
+from ..models import UserState
+from ..actor import generate_reply as _generate_reply, tone_from_emotion as _tone_from_emotion
 
 
 class ActorModel:
@@ -13,11 +13,8 @@ class ActorModel:
     既存の actor.py をラップし、クラスベースのインターフェースを提供。
     """
 
-    def __init__(self):
-        pass
-
+    @staticmethod
     def generate(
-        self,
         user_message: str,
         history: List[Dict],
         state: UserState,
@@ -52,40 +49,8 @@ class ActorModel:
             instruction_override=combined_instruction if combined_instruction else None,
         )
 
-    def generate_reply(
-        self,
-        user_message: str,
-        history: List[Dict],
-        state: UserState,
-        relevant_memories: List[str],
-        instruction_override: Optional[str] = None,
-    ) -> str:
-        """generate のエイリアス（後方互換性用）"""
-        return self.generate(
-            user_message=user_message,
-            history=history,
-            state=state,
-            memories=relevant_memories,
-            instruction_override=instruction_override,
-        )
-
-    @staticmethod
-    def tone_from_emotion(emo: EmotionState) -> str:
-        """PADモデルに基づく演技指針を生成"""
-        tone = []
-        if emo.pleasure >= 5.0:
-            tone.append("明るく楽しげに")
-        elif emo.pleasure <= -5.0:
-            tone.append("不機嫌に、冷たく")
-
-        if emo.arousal >= 5.0:
-            tone.append("テンション高く")
-        elif emo.arousal <= -5.0:
-            tone.append("落ち着いて、あるいは眠げに")
-
-        if emo.dominance >= 5.0:
-            tone.append("自信満々に")
-        elif emo.dominance <= -5.0:
-            tone.append("控えめに、おどおどと")
+    # generate のエイリアス（後方互換性用）。引数が actor.generate_reply と同じなので直接束ねる
+    generate_reply = staticmethod(_generate_reply)
 
-        return "、".join(tone) if tone else "自然体で"
+    # PADモデルに基づく演技指針を生成
+    tone_from_emotion = staticmethod(_tone_from_emotion)
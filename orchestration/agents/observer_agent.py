@@ -13,11 +13,8 @@ class ObserverAgent:
     既存の observer.py をラップし、クラスベースのインターフェースを提供。
     """
 
-    def __init__(self):
-        pass
-
+    @staticmethod
     def update_state(
-        self,
         user_message: str,
         current_state: UserState,
         history: List[Dict],
@@ -35,11 +32,5 @@ class ObserverAgent:
         """
         return _update_state(user_message, current_state, history)
 
-    def observe(
-        self,
-        user_message: str,
-        state: UserState,
-        history: List[Dict],
-    ) -> ObservationResult:
-        """update_stateのエイリアス"""
-        return self.update_state(user_message, state, history)
+    # update_state のエイリアス。引数が observer.update_state と同じなので直接束ねる
+    observe = staticmethod(_update_state)
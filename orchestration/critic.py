@@ -7,6 +7,28 @@ from .settings import settings
 from .prompt_loader import load_prompt
 from .agent_logger import agent_logger
 
+try:
+    import orjson
+except ImportError:  # 任意依存。無ければ標準の json を使う
+    orjson = None
+
+_decoder = json.JSONDecoder()
+
+
+def _parse_json_object(text: str) -> dict:
+    """応答中の最初のJSONオブジェクトをパースする（```json フェンスや前後の文は読み飛ばす）"""
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("JSON object not found in critic response")
+    if orjson is not None:
+        try:
+            return orjson.loads(text[start:text.rfind("}") + 1])
+        except orjson.JSONDecodeError:
+            pass  # 後ろに余計な "}" がある等は raw_decode で読み直す
+    data, _ = _decoder.raw_decode(text, start)
+    return data
+
+
 def check_reply(user_message: str, draft_reply: str) -> Tuple[bool, str]:
     """
     Critic AIを使って、生成された回答がキャラクター設定・ルールに合致しているか判定する。
@@ -46,8 +68,7 @@ def check_reply(user_message: str, draft_reply: str) -> Tuple[bool, str]:
         ) or "{}"
 
         # JSONパース
-        cleaned = response_text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(cleaned)
+        data = _parse_json_object(response_text)
 
         is_ok = data.get("is_ok", False)
         feedback = data.get("feedback", "")
@@ -1,8 +1,9 @@
 """ConversationMemory: 会話ログの管理"""
 from __future__ import annotations
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 
-from ..memory import memory_system, MemoryItem
+if TYPE_CHECKING:
+    from ..memory.vector_store import MemoryItem
 
 
 class ConversationMemory:
@@ -12,7 +13,15 @@ class ConversationMemory:
     """
 
     def __init__(self):
-        self._memory_system = memory_system
+        self._memory_system = None
+
+    @property
+    def memory_system(self):
+        """ChromaDB ベースの記憶システム（初回アクセス時に読み込む）"""
+        if self._memory_system is None:
+            from ..memory.vector_store import memory_system
+            self._memory_system = memory_system
+        return self._memory_system
 
     def save(
         self,
@@ -31,7 +40,7 @@ class ConversationMemory:
             phase: 現在のフェーズ
         """
         # ユーザーメッセージを保存
-        self._memory_system.save_memory(
+        self.memory_system.enqueue_save(
             user_id,
             f"User: {user_message}",
             role="user",
@@ -39,7 +48,7 @@ class ConversationMemory:
         )
 
         # アシスタントの返答を保存
-        self._memory_system.save_memory(
+        self.memory_system.enqueue_save(
             user_id,
             f"Me(Seira): {assistant_reply}",
             role="assistant",
@@ -63,15 +72,14 @@ class ConversationMemory:
         Returns:
             List[str]: 関連記憶のテキストリスト
         """
-        memories = self._memory_system.retrieve_memory(user_id, query, n_results)
-        return [m.text for m in memories]
+        return self.memory_system.retrieve_texts(user_id, query, n_results)
 
     def retrieve_with_metadata(
         self,
         user_id: str,
         query: str,
         n_results: int = 3,
-    ) -> List[MemoryItem]:
+    ) -> List["MemoryItem"]:
         """
         メタデータ付きで関連記憶を検索する。
 
@@ -83,7 +91,7 @@ class ConversationMemory:
         Returns:
             List[MemoryItem]: 関連記憶のリスト
         """
-        return self._memory_system.retrieve_memory(user_id, query, n_results)
+        return self.memory_system.retrieve_memory(user_id, query, n_results)
 
     def clear(self, user_id: str) -> None:
         """
@@ -92,4 +100,4 @@ class ConversationMemory:
         Args:
             user_id: ユーザーID
         """
-        self._memory_system.clear_memory(user_id)
+        self.memory_system.clear_memory(user_id)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import List, Dict, Optional, TYPE_CHECKING
 
 from ..models import UserState, EmotionState
+from ..actor import tone_from_emotion
 from ..rules.rule_selector import SelectedRules
 from ..rules.rule_registry import RuleRegistry
 
@@ -10,6 +11,13 @@ if TYPE_CHECKING:
     from ..memory.structured import UserProfile, Promise, Boundary
 
 
+# キャラクターの口調・性格（Persona と Fixer で共通）
+CHARACTER_TRAITS = """- 一人称は「わたし」
+- ハキハキとした丁寧語（「〜ですっ！」「〜なんです！」）
+- 慌てた時は「はわわ…！」
+- 明るく素直で、夢に向かって頑張っている"""
+
+
 class PromptBuilder:
     """
     プロンプトビルダー
@@ -18,6 +26,64 @@ class PromptBuilder:
 
     def __init__(self, registry: Optional[RuleRegistry] = None):
         self._registry = registry or RuleRegistry.get_instance()
+        # (CharacterCore, 整形済みブロック)。リロードで CharacterCore が
+        # 差し替わったら作り直す。
+        self._persona_cache: Optional[tuple] = None
+        self._fixer_char_cache: Optional[tuple] = None
+        # (Persona ブロック, {演技指針: Persona + 演技指針})
+        self._actor_head_cache: Optional[tuple] = None
+
+    def reload(self) -> None:
+        """キャッシュしたキャラクター設定ブロックを破棄する"""
+        self._persona_cache = None
+        self._fixer_char_cache = None
+        self._actor_head_cache = None
+
+    def _persona_block(self) -> Optional[str]:
+        """キャラクター設定（Persona）ブロックを返す（CharacterCore ごとに1回だけ整形）"""
+        char_core = self._registry.get_character_core()
+        if not char_core:
+            return None
+        cached = self._persona_cache
+        if cached is None or cached[0] is not char_core:
+            cached = (char_core, f"""## キャラクター設定（Persona）
+- 名前: {char_core.name}
+- {char_core.role_short}、{char_core.age}
+{CHARACTER_TRAITS}""")
+            self._persona_cache = cached
+        return cached[1]
+
+    def _actor_head(self, emo: EmotionState) -> str:
+        """Persona + 演技指針ブロックを返す（演技指針の種類ごとに1回だけ連結）"""
+        persona = self._persona_block()
+        tone = self._tone_from_emotion(emo)
+        cached = self._actor_head_cache
+        if cached is None or cached[0] is not persona:
+            # Persona が作り直されたら演技指針ごとの連結結果も捨てる
+            cached = (persona, {})
+            self._actor_head_cache = cached
+        head = cached[1].get(tone)
+        if head is None:
+            head = f"\n## 演技指針\n{tone}"
+            if persona:
+                head = f"{persona}\n{head}"
+            cached[1][tone] = head
+        return head
+
+    def _fixer_char_info(self) -> str:
+        """Fixer用のキャラクター設定ブロックを返す（CharacterCore ごとに1回だけ整形）"""
+        char_core = self._registry.get_character_core()
+        if not char_core:
+            return ""
+        cached = self._fixer_char_cache
+        if cached is None or cached[0] is not char_core:
+            cached = (char_core, f"""## キャラクター設定
+- 名前: {char_core.name}
+- {char_core.role_short}、{char_core.age}
+{CHARACTER_TRAITS}
+""")
+            self._fixer_char_cache = cached
+        return cached[1]
 
     def build_actor_prompt(
         self,
@@ -67,12 +133,12 @@ class PromptBuilder:
             parts.append(f"\n## 強制指示\n{instruction_override}")
 
         # 会話履歴（直近3件）
-        recent_history = history[-3:] if history else []
-        if recent_history:
-            history_text = "\n".join([
+        if history:
+            recent_history = history if len(history) <= 3 else history[-3:]
+            history_text = "\n".join(
                 f"- {h.get('role', 'unknown')}: {h.get('content', '')}"
                 for h in recent_history
-            ])
+            )
             parts.append(f"\n## 直近会話履歴\n{history_text}")
 
         # ユーザー発話
@@ -99,18 +165,7 @@ class PromptBuilder:
         Returns:
             str: 構築されたプロンプト
         """
-        char_core = self._registry.get_character_core()
-        char_info = ""
-        if char_core:
-            char_info = f"""## キャラクター設定
-- 名前: {char_core.name}
-- {char_core.role_short}、{char_core.age}
-- 一人称は「わたし」
-- ハキハキとした丁寧語（「〜ですっ！」「〜なんです！」）
-- 慌てた時は「はわわ…！」
-- 明るく素直で、夢に向かって頑張っている
-"""
-
+        char_info = self._fixer_char_info()
         violations_text = "\n".join([f"- {v}" for v in violations])
         instructions_text = "\n".join([f"- {i}" for i in fix_instructions])
 
@@ -140,23 +195,7 @@ class PromptBuilder:
 
     def _tone_from_emotion(self, emo: EmotionState) -> str:
         """PADモデルに基づく演技指針を生成"""
-        tone = []
-        if emo.pleasure >= 5.0:
-            tone.append("明るく楽しげに")
-        elif emo.pleasure <= -5.0:
-            tone.append("不機嫌に、冷たく")
-
-        if emo.arousal >= 5.0:
-            tone.append("テンション高く")
-        elif emo.arousal <= -5.0:
-            tone.append("落ち着いて、あるいは眠げに")
-
-        if emo.dominance >= 5.0:
-            tone.append("自信満々に")
-        elif emo.dominance <= -5.0:
-            tone.append("控えめに、おどおどと")
-
-        return "、".join(tone) if tone else "自然体で"
+        return tone_from_emotion(emo)
 
     def build_actor_prompt_v2(
         self,
@@ -195,59 +234,44 @@ class PromptBuilder:
         Returns:
             str: 構築されたプロンプト
         """
-        parts = []
-
-        # 1. Persona（キャラクター設定）
-        char_core = self._registry.get_character_core()
-        if char_core:
-            parts.append(f"""## キャラクター設定（Persona）
-- 名前: {char_core.name}
-- {char_core.role_short}、{char_core.age}
-- 一人称は「わたし」
-- ハキハキとした丁寧語（「〜ですっ！」「〜なんです！」）
-- 慌てた時は「はわわ…！」
-- 明るく素直で、夢に向かって頑張っている""")
-
-        # 演技指針
-        tone = self._tone_from_emotion(state.emotion)
-        parts.append(f"\n## 演技指針\n{tone}")
+        # 1. Persona（キャラクター設定）+ 演技指針
+        parts = [self._actor_head(state.emotion)]
 
         # 2. UserProfile（ユーザー情報）
         if user_profile:
-            profile_lines = ["## ユーザー情報"]
-            if user_profile.name:
-                profile_lines.append(f"- 名前: {user_profile.name}")
-            if user_profile.age:
-                profile_lines.append(f"- 年齢: {user_profile.age}歳")
-            if user_profile.occupation:
-                profile_lines.append(f"- 職業: {user_profile.occupation}")
-            if user_profile.location:
-                profile_lines.append(f"- 住所: {user_profile.location}")
+            profile_lines = [
+                fmt.format(value)
+                for fmt, value in (
+                    ("- 名前: {}", user_profile.name),
+                    ("- 年齢: {}歳", user_profile.age),
+                    ("- 職業: {}", user_profile.occupation),
+                    ("- 住所: {}", user_profile.location),
+                )
+                if value
+            ]
             if user_profile.hobbies:
                 profile_lines.append(f"- 趣味: {', '.join(user_profile.hobbies)}")
             if user_profile.preferences:
-                for key, value in user_profile.preferences.items():
-                    profile_lines.append(f"- 好きな{key}: {value}")
+                profile_lines.extend(
+                    f"- 好きな{key}: {value}" for key, value in user_profile.preferences.items()
+                )
 
-            if len(profile_lines) > 1:
-                parts.append("\n" + "\n".join(profile_lines))
+            if profile_lines:
+                parts.append("\n## ユーザー情報\n" + "\n".join(profile_lines))
 
         # 3a. 約束（守るべきこと）
         if promises:
-            promise_lines = ["## 守るべき約束"]
-            for p in promises:
-                status_mark = "✓" if p.status == "fulfilled" else "○"
-                promise_lines.append(f"- [{status_mark}] {p.content}")
-            parts.append("\n" + "\n".join(promise_lines))
+            parts.append("\n## 守るべき約束\n" + "\n".join(
+                f"- [{'✓' if p.status == 'fulfilled' else '○'}] {p.content}"
+                for p in promises
+            ))
 
         # 3b. 境界線（NG）
         if boundaries:
-            boundary_lines = ["## 触れてはいけない話題・行動（NG）"]
-            for b in boundaries:
-                severity_mark = "⚠️" if b.severity >= 0.8 else "△"
-                boundary_lines.append(f"- {severity_mark} {b.content}（{b.category}）")
-            boundary_lines.append("\n※ これらの話題には触れないでください")
-            parts.append("\n" + "\n".join(boundary_lines))
+            parts.append("\n## 触れてはいけない話題・行動（NG）\n" + "\n".join(
+                f"- {'⚠️' if b.severity >= 0.8 else '△'} {b.content}（{b.category}）"
+                for b in boundaries
+            ) + "\n\n※ これらの話題には触れないでください")
 
         # ルール要約
         if selected_rules:
@@ -259,18 +283,17 @@ class PromptBuilder:
 
         # 4. 検索エピソード（Vector検索結果）
         if retrieved_episodes:
-            episode_lines = ["## 関連する過去のエピソード"]
-            for ep in retrieved_episodes:
-                episode_lines.append(f"- {ep}")
-            parts.append("\n" + "\n".join(episode_lines))
+            parts.append("\n## 関連する過去のエピソード\n" + "\n".join(
+                f"- {ep}" for ep in retrieved_episodes
+            ))
 
         # 5. 短期記憶（直近会話）
-        recent_history = history[-5:] if history else []
-        if recent_history:
-            history_text = "\n".join([
+        if history:
+            recent_history = history if len(history) <= 5 else history[-5:]
+            history_text = "\n".join(
                 f"- {h.get('role', 'unknown')}: {h.get('content', '')}"
                 for h in recent_history
-            ])
+            )
             parts.append(f"\n## 直近の会話\n{history_text}")
 
         # 6. ユーザー発話
@@ -4,14 +4,13 @@ from typing import Dict, Any, Optional
 from .state import GraphState
 from .nodes import (
     node_load_state,
-    node_observe,
-    node_retrieve_memory,
-    node_select_rules,
+    node_fanout,
     node_generate,
     node_validate,
     node_fix,
     node_save,
     should_retry,
+    after_fix,
 )
 
 # LangGraphのインポート（利用可能な場合のみ）
@@ -23,6 +22,29 @@ except ImportError:
     print("[dialogue_graph] Warning: langgraph not installed. Using fallback.")
 
 
+# 初期状態のテンプレート（user_id / user_message 以外）。
+# ノードはリストをその場で書き換えず新しいリストを返すので、浅いコピーで共有してよい。
+_INITIAL_STATE_TEMPLATE: Dict[str, Any] = {
+    "user_state": None,
+    "history": [],
+    "memories": [],
+    "selected_rules": None,
+    "draft_reply": "",
+    "final_reply": "",
+    "validation_result": None,
+    "retry_count": 0,
+    "max_retries": 2,
+    "fix_applied": False,
+    "instruction_override": None,
+    "errors": [],
+}
+
+# 最長経路: load_state → fanout → generate → validate
+#           → (fix → generate → validate) × max_retries(2) → save = 11 ステップ。
+# 余裕を持たせつつ、想定外のループは早めに打ち切る。
+_INVOKE_CONFIG = {"recursion_limit": 16}
+
+
 def create_dialogue_graph():
     """対話グラフを構築"""
     if not LANGGRAPH_AVAILABLE:
@@ -32,9 +54,8 @@ def create_dialogue_graph():
 
     # ノード追加
     graph.add_node("load_state", node_load_state)
-    graph.add_node("observe", node_observe)
-    graph.add_node("retrieve_memory", node_retrieve_memory)
-    graph.add_node("select_rules", node_select_rules)
+    # observe / retrieve_memory / select_rules は fanout 内で並行に実行する
+    graph.add_node("fanout", node_fanout)
     graph.add_node("generate", node_generate)
     graph.add_node("validate", node_validate)
     graph.add_node("fix", node_fix)
@@ -44,10 +65,8 @@ def create_dialogue_graph():
     graph.set_entry_point("load_state")
 
     # 順次エッジ
-    graph.add_edge("load_state", "observe")
-    graph.add_edge("observe", "retrieve_memory")
-    graph.add_edge("retrieve_memory", "select_rules")
-    graph.add_edge("select_rules", "generate")
+    graph.add_edge("load_state", "fanout")
+    graph.add_edge("fanout", "generate")
     graph.add_edge("generate", "validate")
 
     # 条件分岐エッジ
@@ -60,8 +79,15 @@ def create_dialogue_graph():
         }
     )
 
-    # 修正後は再生成へ
-    graph.add_edge("fix", "generate")
+    # 修正できた発話は再検証へ（Actorを呼び直さない）、修正できなければ再生成へ
+    graph.add_conditional_edges(
+        "fix",
+        after_fix,
+        {
+            "validate": "validate",
+            "generate": "generate",
+        }
+    )
 
     # 保存後は終了
     graph.add_edge("save", END)
@@ -76,25 +102,14 @@ def run_dialogue_graph(user_id: str, user_message: str) -> Dict[str, Any]:
         from ..orchestrator import process_chat_turn
         return process_chat_turn(user_id, user_message)
 
-    # 初期状態
     initial_state: GraphState = {
+        **_INITIAL_STATE_TEMPLATE,
         "user_id": user_id,
         "user_message": user_message,
-        "user_state": None,
-        "history": [],
-        "memories": [],
-        "selected_rules": None,
-        "draft_reply": "",
-        "final_reply": "",
-        "validation_result": None,
-        "retry_count": 0,
-        "max_retries": 2,
-        "instruction_override": None,
-        "errors": [],
     }
 
     # グラフ実行
-    final_state = dialogue_graph.invoke(initial_state)
+    final_state = dialogue_graph.invoke(initial_state, config=_INVOKE_CONFIG)
 
     return {
         "reply": final_state.get("final_reply", ""),
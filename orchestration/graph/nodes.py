@@ -1,4 +1,6 @@
 """LangGraphのノード関数定義"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any
 
 from .state import GraphState
@@ -8,59 +10,40 @@ from ..rules.rule_selector import RuleSelector
 from ..validation.output_validator import OutputValidator
 from ..validation.output_fixer import OutputFixer
 
+logger = logging.getLogger(__name__)
 
-# シングルトンインスタンス（遅延初期化）
-_registry = None
-_rule_selector = None
-_validator = None
-_fixer = None
+# node_fanout で記憶検索を回すスレッド数（ネットワークI/O待ちが主なのでスレッドで十分）
+FANOUT_MAX_WORKERS = 8
 
-
-def _get_registry() -> RuleRegistry:
-    global _registry
-    if _registry is None:
-        _registry = RuleRegistry.get_instance()
-    return _registry
-
-
-def _get_rule_selector() -> RuleSelector:
-    global _rule_selector
-    if _rule_selector is None:
-        _rule_selector = RuleSelector(_get_registry())
-    return _rule_selector
-
-
-def _get_validator() -> OutputValidator:
-    global _validator
-    if _validator is None:
-        _validator = OutputValidator()
-    return _validator
-
-
-def _get_fixer() -> OutputFixer:
-    global _fixer
-    if _fixer is None:
-        _fixer = OutputFixer()
-    return _fixer
+# シングルトンインスタンス（グラフ構築時＝このモジュールの import 時に1回だけ作る）
+_registry = RuleRegistry.get_instance()
+_rule_selector = RuleSelector(_registry)
+_validator = OutputValidator()
+_fixer = OutputFixer()
+# スレッドは最初の submit 時に起動される
+_fanout_pool = ThreadPoolExecutor(
+    max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="graph-fanout"
+)
 
 
 def node_load_state(state: GraphState) -> Dict[str, Any]:
     """初期状態のロード"""
-    from ..storage import fetch_state, fetch_history, init_db
+    from ..orchestrator import ensure_storage_ready
+    from ..storage import fetch_state_and_history
 
-    init_db()
+    # DB 初期化はプロセスで1回だけ
+    ensure_storage_ready()
 
-    user_state = fetch_state(state["user_id"])
+    user_state, history = fetch_state_and_history(state["user_id"])
     if user_state is None:
         user_state = UserState.new(state["user_id"])
 
-    history = fetch_history(state["user_id"])
-
     return {
         "user_state": user_state,
         "history": history,
         "retry_count": 0,
         "max_retries": 2,
+        "fix_applied": False,
         "errors": [],
         "memories": [],
         "draft_reply": "",
@@ -92,9 +75,9 @@ def node_observe(state: GraphState) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"[node_observe] Error: {e}")
+        logger.exception("[node_observe] Error")
         return {
-            "errors": state.get("errors", []) + [f"Observer error: {e}"],
+            "errors": [f"Observer error: {e}"],
         }
 
 
@@ -115,18 +98,17 @@ def node_retrieve_memory(state: GraphState) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"[node_retrieve_memory] Error: {e}")
+        logger.exception("[node_retrieve_memory] Error")
         return {
             "memories": [],
-            "errors": state.get("errors", []) + [f"Memory error: {e}"],
+            "errors": [f"Memory error: {e}"],
         }
 
 
 def node_select_rules(state: GraphState) -> Dict[str, Any]:
     """RuleSelector: 適用ルールの選択"""
     try:
-        selector = _get_rule_selector()
-        selected = selector.select_rules(
+        selected = _rule_selector.select_rules(
             state=state["user_state"],
             user_message=state["user_message"],
             history=state["history"],
@@ -137,12 +119,34 @@ def node_select_rules(state: GraphState) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"[node_select_rules] Error: {e}")
+        logger.exception("[node_select_rules] Error")
         return {
-            "errors": state.get("errors", []) + [f"RuleSelector error: {e}"],
+            "errors": [f"RuleSelector error: {e}"],
         }
 
 
+def node_fanout(state: GraphState) -> Dict[str, Any]:
+    """
+    記憶検索と Observer → ルール選択を並行に実行する。
+
+    記憶検索はユーザー発話だけに依存するので、Observer（LLM呼び出し + 状態保存）
+    と同時に走らせる。ルール選択は更新後の状態を使うため Observer の後に行う。
+    """
+    memory_future = _fanout_pool.submit(node_retrieve_memory, state)
+
+    observe_updates = node_observe(state)
+    rules_updates = node_select_rules({**state, **observe_updates})
+    memory_updates = memory_future.result()
+
+    # errors はリデューサで追記されるので、各ノードの新しいエラーだけを並べて返す
+    errors = [
+        *observe_updates.pop("errors", ()),
+        *rules_updates.pop("errors", ()),
+        *memory_updates.pop("errors", ()),
+    ]
+    return {**observe_updates, **rules_updates, **memory_updates, "errors": errors}
+
+
 def node_generate(state: GraphState) -> Dict[str, Any]:
     """Actor: 発話生成"""
     from ..actor import generate_reply
@@ -153,14 +157,8 @@ def node_generate(state: GraphState) -> Dict[str, Any]:
         if state.get("selected_rules"):
             # 要約は長すぎるので、重要な部分だけ
             rules = state["selected_rules"]
-            if rules.state_dependent_rules:
-                sdr_hints = [
-                    r.prompt_hint or r.description
-                    for r in rules.state_dependent_rules
-                    if r.prompt_hint or r.description
-                ]
-                if sdr_hints:
-                    instruction += "\n\n[状態依存ルール]\n" + "\n".join(f"- {h}" for h in sdr_hints[:3])
+            if rules.rendered_hints:
+                instruction += "\n\n[状態依存ルール]\n" + rules.rendered_hints
 
             if rules.allow_nsfw:
                 instruction += "\n\n[NSFW許可: このフェーズでは性的な描写が許可されています]"
@@ -178,25 +176,25 @@ def node_generate(state: GraphState) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"[node_generate] Error: {e}")
+        logger.exception("[node_generate] Error")
         return {
             "draft_reply": "",
-            "errors": state.get("errors", []) + [f"Actor error: {e}"],
+            "errors": [f"Actor error: {e}"],
         }
 
 
 def node_validate(state: GraphState) -> Dict[str, Any]:
     """Validator: 出力検証"""
     try:
-        validator = _get_validator()
 
-        if not state.get("selected_rules"):
-            # ルールがなければスキップ
+        rules = state.get("selected_rules")
+        if not rules or not rules.has_constraints:
+            # 検証するルールがなければスキップ（should_retry は save へ進む）
             return {
                 "validation_result": None,
             }
 
-        result = validator.validate(
+        result = _validator.validate(
             output_text=state["draft_reply"],
             user_message=state["user_message"],
             selected_rules=state["selected_rules"],
@@ -208,24 +206,24 @@ def node_validate(state: GraphState) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"[node_validate] Error: {e}")
+        logger.exception("[node_validate] Error")
         return {
             "validation_result": None,
-            "errors": state.get("errors", []) + [f"Validator error: {e}"],
+            "errors": [f"Validator error: {e}"],
         }
 
 
 def node_fix(state: GraphState) -> Dict[str, Any]:
     """Fixer: 出力修正"""
     try:
-        fixer = _get_fixer()
 
         if not state.get("validation_result"):
             return {
                 "retry_count": state.get("retry_count", 0) + 1,
+                "fix_applied": False,
             }
 
-        fix_result = fixer.fix(
+        fix_result = _fixer.fix(
             original_text=state["draft_reply"],
             validation_result=state["validation_result"],
             user_message=state["user_message"],
@@ -235,19 +233,22 @@ def node_fix(state: GraphState) -> Dict[str, Any]:
             return {
                 "draft_reply": fix_result.fixed_text,
                 "retry_count": state.get("retry_count", 0) + 1,
+                "fix_applied": True,
             }
         else:
             # 修正失敗（BLOCKなど）
             return {
                 "retry_count": state.get("retry_count", 0) + 1,
-                "errors": state.get("errors", []) + ["Fix failed: blocked content"],
+                "fix_applied": False,
+                "errors": ["Fix failed: blocked content"],
             }
 
     except Exception as e:
-        print(f"[node_fix] Error: {e}")
+        logger.exception("[node_fix] Error")
         return {
             "retry_count": state.get("retry_count", 0) + 1,
-            "errors": state.get("errors", []) + [f"Fixer error: {e}"],
+            "fix_applied": False,
+            "errors": [f"Fixer error: {e}"],
         }
 
 
@@ -270,7 +271,7 @@ def node_save(state: GraphState) -> Dict[str, Any]:
         memory.add_message("assistant", final_reply)
 
     except Exception as e:
-        print(f"[node_save] Error: {e}")
+        logger.exception("[node_save] Error")
 
     return {
         "final_reply": final_reply,
@@ -293,8 +294,15 @@ def should_retry(state: GraphState) -> str:
     retry_count = state.get("retry_count", 0)
     max_retries = state.get("max_retries", 2)
     if retry_count >= max_retries:
-        print(f"[should_retry] Max retries ({max_retries}) reached. Using current reply.")
+        logger.warning("[should_retry] Max retries (%d) reached. Using current reply.", max_retries)
         return "save"
 
     # 違反があるので修正へ
     return "fix"
+
+
+def after_fix(state: GraphState) -> str:
+    """修正後の分岐: 修正できた発話はそのまま再検証し、できなければ再生成する"""
+    if state.get("fix_applied"):
+        return "validate"
+    return "generate"
@@ -1,5 +1,6 @@
 """LangGraph用の状態定義"""
-from typing import TypedDict, List, Optional, Dict, Any
+import operator
+from typing import Annotated, TypedDict, List, Optional, Dict, Any
 
 from ..models import UserState
 from ..rules.rule_selector import SelectedRules
@@ -28,9 +29,10 @@ class GraphState(TypedDict):
     validation_result: Optional[ValidationResult]
     retry_count: int
     max_retries: int
+    fix_applied: bool  # 直前の node_fix で修正済みの発話に差し替えたか
 
     # Observer からの指示
     instruction_override: Optional[str]
 
-    # エラー情報
-    errors: List[str]
+    # エラー情報（ノードは新しいエラーだけを返し、operator.add で追記される）
+    errors: Annotated[List[str], operator.add]
@@ -6,9 +6,11 @@
 """
 from __future__ import annotations
 
+import atexit
+import hashlib
+import itertools
 import json
-import random
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Type, Union
 
 from .settings import settings
 
@@ -17,6 +19,33 @@ try:
 except Exception:  # ImportError 他
     OpenAI = None  # type: ignore
 
+try:
+    from pydantic import BaseModel
+except ImportError:
+    BaseModel = None  # type: ignore
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore
+
+try:
+    import h2  # noqa: F401  httpx の HTTP/2 対応に必要
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+__all__ = ["LLMClient", "llm_client"]
+
+# LLM APIへのHTTP接続プール設定（OpenAI / xAI で共有する）
+HTTP_TIMEOUT_SEC = 60.0
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE = 32
+HTTP_KEEPALIVE_EXPIRY_SEC = 300.0
+
+
+# DRY RUNモードで返すダミーembeddingの次元数（text-embedding-3-small と同じ）
+DRY_RUN_EMBEDDING_DIM = 1536
 
 # DRY RUN用のテストレスポンス
 DRY_RUN_RESPONSES = {
@@ -37,24 +66,50 @@ DRY_RUN_RESPONSES = {
     }
 }
 
+# DRY RUN の Actor 応答は順番に返す（乱数を使わないのでテストでも再現性がある）
+_DRY_RUN_ACTOR_CYCLE = itertools.cycle(DRY_RUN_RESPONSES["actor"])
+
 
 class LLMClient:
     def __init__(self):
         self.clients: Dict[str, Optional[Any]] = {"openai": None, "xai": None}
+        self._http = None
         if OpenAI:
             if settings.llm.api_key:
                 # base_url が None の場合は引数に渡さない (OpenAIデフォルトを使う)
                 kwargs = {"api_key": settings.llm.api_key}
                 if settings.llm.openai_base_url:
                     kwargs["base_url"] = settings.llm.openai_base_url
-                self.clients["openai"] = OpenAI(**kwargs)
+                self.clients["openai"] = OpenAI(**kwargs, **self._http_kwargs())
 
             if settings.llm.xai_api_key:
                 self.clients["xai"] = OpenAI(
                     api_key=settings.llm.xai_api_key,
                     base_url=settings.llm.xai_base_url,
+                    **self._http_kwargs(),
                 )
 
+    def _http_kwargs(self) -> Dict[str, Any]:
+        """OpenAI() に渡す共有 http_client（keepalive 付きの接続プール）"""
+        if httpx is None:
+            return {}
+        if self._http is None:
+            self._http = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                timeout=HTTP_TIMEOUT_SEC,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SEC,
+                ),
+            )
+        return {"http_client": self._http}
+
+    def close(self) -> None:
+        """共有HTTP接続プールを閉じる"""
+        if self._http is not None:
+            self._http.close()
+
     @property
     def available(self) -> bool:
         return any(self.clients.values())
@@ -95,15 +150,31 @@ class LLMClient:
         self,
         model: str,
         messages: List[Dict[str, str]],
-        schema: Dict[str, Any],
+        schema: Union[Dict[str, Any], Type[Any]],
         provider: str,
         agent_type: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """JSON schema を指定した structured 出力。"""
+        """
+        JSON schema を指定した structured 出力。
+
+        schema に Pydantic モデルのクラスを渡した場合は parse API を使い、
+        SDK が検証済みのオブジェクトを dict にして返す（文字列の再パースをしない）。
+        """
         # DRY RUNモードの場合はテストデータを返す
         if settings.dry_run:
             return self._dry_run_json_response(agent_type or "observer")
 
+        if BaseModel is not None and isinstance(schema, type) and issubclass(schema, BaseModel):
+            resp = self._pick(provider).chat.completions.parse(
+                model=model,
+                messages=messages,
+                response_format=schema,
+            )
+            parsed = resp.choices[0].message.parsed
+            if parsed is None:
+                raise RuntimeError("LLM returned no parsed content")
+            return parsed.model_dump()
+
         content = self.chat(
             model=model,
             messages=messages,
@@ -115,7 +186,7 @@ class LLMClient:
     def _dry_run_response(self, agent_type: str) -> str:
         """DRY RUN用のテキストレスポンスを返す"""
         if agent_type == "actor":
-            return random.choice(DRY_RUN_RESPONSES["actor"])
+            return next(_DRY_RUN_ACTOR_CYCLE)
         elif agent_type == "critic":
             return json.dumps(DRY_RUN_RESPONSES["critic"])
         else:
@@ -128,13 +199,15 @@ class LLMClient:
 
     def embed(self, text: str, model: str = "text-embedding-3-small") -> List[float]:
         """テキストをベクトル化する（OpenAI Embedding API）"""
+        return self.embed_batch([text], model=model)[0]
+
+    def embed_batch(self, texts: List[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+        """複数テキストを1回のAPI呼び出しでベクトル化する（入力と同じ順序で返す）"""
+        if not texts:
+            return []
+
         if settings.dry_run:
-            # DRY RUNモードでは1536次元のダミーベクトルを返す
-            import hashlib
-            # テキストのハッシュを使って一貫したダミーベクトルを生成
-            hash_val = int(hashlib.md5(text.encode()).hexdigest(), 16)
-            random.seed(hash_val)
-            return [random.uniform(-1, 1) for _ in range(1536)]
+            return [self._dry_run_embedding(text) for text in texts]
 
         # OpenAIクライアントを使用（embeddingはOpenAI APIのみ）
         client = self.clients.get("openai")
@@ -143,9 +216,19 @@ class LLMClient:
 
         resp = client.embeddings.create(
             model=model,
-            input=text
+            input=texts
         )
-        return resp.data[0].embedding
+        # data は index 順に返るが、念のため index で並べ直す
+        return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+    @staticmethod
+    def _dry_run_embedding(text: str) -> List[float]:
+        """DRY RUNモード用の1536次元のダミーベクトル"""
+        # テキストから可変長ハッシュ（SHAKE256）で 1536 個の int16 を一度に作り、
+        # [-1, 1) に正規化する。
+        digest = hashlib.shake_256(text.encode()).digest(DRY_RUN_EMBEDDING_DIM * 2)
+        return [v / 32768 for v in memoryview(digest).cast("h")]
 
 
 llm_client = LLMClient()
+atexit.register(llm_client.close)
@@ -15,9 +15,17 @@ from .short_term import ShortTermMemory
 from .mid_term import MidTermMemoryManager
 from .long_term import LongTermMemoryManager
 
-# 後方互換性のため残す（非推奨）
-# 使用時に DeprecationWarning が発生します
-from .vector_store import memory_system
+
+def __getattr__(name: str):
+    # 後方互換性のため残す（非推奨）
+    # ChromaDB を読み込むため、参照されたときだけインポートする。
+    # 使用時に DeprecationWarning が発生します
+    if name == "memory_system":
+        from .vector_store import memory_system
+        globals()["memory_system"] = memory_system
+        return memory_system
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "HierarchicalMemory",
@@ -0,0 +1,84 @@
+"""Embedding のコンテンツアドレス型キャッシュ
+
+同じテキストのベクトル化（長期記憶の保存・検索）で Embedding API を
+呼び直さないよう、モデル名とテキストのハッシュをキーにベクトルを保持する。
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+
+# 保持するベクトル数（1536次元 float32 で 1件 約6KB）
+EMBED_CACHE_MAX_ENTRIES = 4096
+# 有効期限（秒）。キーにモデル名を含むので、同じキーなら結果は変わらず長めに持てる
+EMBED_CACHE_TTL_SEC = 30 * 24 * 60 * 60
+
+# embed_batch(texts, model=...) の形で呼ぶ
+EmbedBatchFn = Callable[..., List[List[float]]]
+
+
+def _cache_key(model: str, text: str) -> bytes:
+    """モデル名とテキストからキーを作る（モデルを変えたら旧モデルのベクトルを返さない）"""
+    h = hashlib.blake2b(model.encode("utf-8"), digest_size=32)
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.digest()
+
+
+class EmbeddingCache:
+    """TTL付きLRUのEmbeddingキャッシュ（ベクトルは float32 の array で保持）"""
+
+    def __init__(self, max_entries: int = EMBED_CACHE_MAX_ENTRIES, ttl_sec: float = EMBED_CACHE_TTL_SEC):
+        self._max_entries = max_entries
+        self._ttl_sec = ttl_sec
+        # key -> (期限の monotonic 秒, ベクトル)
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: bytes, now: float) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1].tolist()
+
+    def _put(self, key: bytes, vector: Sequence[float], now: float) -> None:
+        with self._lock:
+            self._entries[key] = (now + self._ttl_sec, array("f", vector))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def embed_many(self, texts: List[str], embed_batch: EmbedBatchFn, model: str) -> List[List[float]]:
+        """texts を model でベクトル化する。キャッシュにないものだけを1回の embed_batch で取得する"""
+        now = time.monotonic()
+        keys = [_cache_key(model, text) for text in texts]
+        vectors: List[Optional[List[float]]] = [self._get(key, now) for key in keys]
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fetched = embed_batch([texts[i] for i in missing], model=model)
+            for i, vector in zip(missing, fetched):
+                vectors[i] = vector
+                self._put(keys[i], vector, now)
+        return vectors  # type: ignore[return-value]
+
+    def embed(self, text: str, embed_batch: EmbedBatchFn, model: str) -> List[float]:
+        """1件をベクトル化する（embed_many の単発版）"""
+        return self.embed_many([text], embed_batch, model)[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# グローバルインスタンス（プロセス内で共有）
+embedding_cache = EmbeddingCache()
@@ -110,35 +110,19 @@ class MemoryCompressor:
             減衰させた記憶の数
         """
         try:
-            threshold_date = (datetime.utcnow() - timedelta(days=DECAY_DAYS)).isoformat()
-
-            # 古い記憶を取得
-            result = self._supabase.table("long_term_memory") \
-                .select("id, importance") \
-                .eq("user_id", self.user_id) \
-                .lt("last_accessed_at", threshold_date) \
-                .execute()
-
-            decayed_count = 0
-            for memory in result.data:
-                new_importance = memory["importance"] - DECAY_AMOUNT
-
-                if new_importance < MIN_IMPORTANCE:
-                    # 重要度が閾値以下なら削除
-                    self._supabase.table("long_term_memory") \
-                        .delete() \
-                        .eq("id", memory["id"]) \
-                        .execute()
-                else:
-                    # 重要度を更新
-                    self._supabase.table("long_term_memory") \
-                        .update({"importance": new_importance}) \
-                        .eq("id", memory["id"]) \
-                        .execute()
-
-                decayed_count += 1
+            # 減衰・削除はSupabase側の1つのSQL関数でまとめて行う（行ごとの往復をしない）
+            # decay_long_term_memory 関数は data/supabase_schema.sql で作成
+            result = self._supabase.client.rpc(
+                "decay_long_term_memory",
+                {
+                    "match_user_id": self.user_id,
+                    "decay_days": DECAY_DAYS,
+                    "decay_amount": DECAY_AMOUNT,
+                    "min_importance": MIN_IMPORTANCE,
+                }
+            ).execute()
 
-            return decayed_count
+            return result.data or 0
 
         except Exception as e:
             print(f"[MemoryCompressor] 減衰処理エラー: {e}")
@@ -155,36 +139,17 @@ class MemoryCompressor:
             アーカイブした記憶の数
         """
         try:
-            # 低重要度の記憶を取得
-            result = self._supabase.table("long_term_memory") \
-                .select("*") \
-                .eq("user_id", self.user_id) \
-                .lt("importance", threshold) \
-                .execute()
-
-            archived_count = 0
-            for memory in result.data:
-                # アーカイブテーブルに移動
-                archive_data = {
-                    "original_id": memory["id"],
-                    "user_id": memory["user_id"],
-                    "content": memory["content"],
-                    "memory_type": memory.get("memory_type", "fact"),
-                    "importance": memory["importance"],
-                    "original_created_at": memory.get("created_at"),
-                    "archived_at": datetime.utcnow().isoformat(),
+            # archived_memories への移動と削除を1つのSQL関数で原子的に行う
+            # archive_long_term_memory 関数は data/supabase_schema.sql で作成
+            result = self._supabase.client.rpc(
+                "archive_long_term_memory",
+                {
+                    "match_user_id": self.user_id,
+                    "threshold": threshold,
                 }
-                self._supabase.table("archived_memories").insert(archive_data).execute()
-
-                # 元テーブルから削除
-                self._supabase.table("long_term_memory") \
-                    .delete() \
-                    .eq("id", memory["id"]) \
-                    .execute()
-
-                archived_count += 1
+            ).execute()
 
-            return archived_count
+            return result.data or 0
 
         except Exception as e:
             print(f"[MemoryCompressor] アーカイブエラー: {e}")
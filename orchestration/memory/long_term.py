@@ -5,11 +5,21 @@
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
 from dataclasses import dataclass
 
-from .supabase_client import get_supabase
+try:
+    import numpy as np
+    import orjson
+except ImportError:  # 無ければ標準の json で組み立てる
+    np = None  # type: ignore
+    orjson = None  # type: ignore
+
+from ._embed_cache import embedding_cache
+from .supabase_client import SupabaseClient, get_supabase
 
 
 # 記憶タイプ
@@ -20,8 +30,17 @@ DECAY_DAYS = 30  # 未アクセスからこの日数で減衰開始
 DECAY_AMOUNT = 0.1  # 減衰量
 MIN_IMPORTANCE = 0.1  # これ以下で削除対象
 
+# ベクトル化に使うモデル（embedding 列の次元 1536 と対応。Embeddingキャッシュのキーにも含まれる）
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# この重要度未満の記憶はベクトル化しない（ベクトル検索の対象外。一覧・重要度順の取得には出る）
+EMBED_IMPORTANCE_THRESHOLD = 0.4
+
+# 読み出し時に取得する列。embedding（1536次元で1行約6KB）は検索RPC内でしか使わないので含めない
+_ENTRY_COLUMNS = "id, user_id, content, memory_type, importance, source_mid_term_id, created_at, last_accessed_at"
+
 
-@dataclass
+@dataclass(slots=True)
 class LongTermMemoryEntry:
     """長期記憶のエントリ"""
     id: str
@@ -34,21 +53,32 @@ class LongTermMemoryEntry:
     last_accessed_at: str
 
 
+def _vector_literal(vector: Sequence[float]) -> str:
+    """pgvector のテキスト表現（"[0.1,-0.02,...]"）に変換する。
+
+    リストのまま渡すと supabase-py が標準 json で1要素ずつ float64 の長い表記に
+    直すので、float32 の最短表記で先に文字列化しておく（サイズはおよそ半分）。
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            np.asarray(vector, dtype=np.float32), option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    return json.dumps(list(vector), separators=(",", ":"))
+
+
+@lru_cache(maxsize=1)
+def _llm():
+    """LLMクライアントを遅延 import して返す（初回のみ import し、以降はキャッシュ）"""
+    from ..llm_client import llm_client
+    return llm_client
+
+
 class LongTermMemoryManager:
     """長期記憶管理クラス"""
 
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, supabase: Optional[SupabaseClient] = None):
         self.user_id = user_id
-        self._supabase = get_supabase()
-        self._llm_client = None
-
-    @property
-    def llm_client(self):
-        """遅延初期化でLLMクライアントを取得"""
-        if self._llm_client is None:
-            from ..llm_client import llm_client
-            self._llm_client = llm_client
-        return self._llm_client
+        self._supabase = supabase or get_supabase()
 
     def save(
         self,
@@ -69,35 +99,64 @@ class LongTermMemoryManager:
         Returns:
             作成されたメモリのID
         """
-        if memory_type not in MEMORY_TYPES:
-            print(f"[LongTermMemory] 不正な記憶タイプ: {memory_type}")
-            memory_type = "fact"
+        ids = self.save_many([{
+            "content": content,
+            "memory_type": memory_type,
+            "importance": importance,
+            "source_mid_term_id": source_mid_term_id,
+        }])
+        return ids[0] if ids else None
+
+    def save_many(self, entries: List[Dict]) -> List[str]:
+        """
+        複数の長期記憶をまとめて保存する（Embedding 1回 + INSERT 1回）。
 
-        # ベクトル化
-        try:
-            embedding = self.llm_client.embed(content)
-        except Exception as e:
-            print(f"[LongTermMemory] Embedding生成エラー: {e}")
-            embedding = None
+        Args:
+            entries: save() と同じキー（content, memory_type, importance,
+                source_mid_term_id）を持つ dict のリスト
 
-        try:
-            data = {
-                "user_id": self.user_id,
-                "content": content,
-                "memory_type": memory_type,
-                "importance": min(1.0, max(0.0, importance)),
-                "source_mid_term_id": source_mid_term_id,
-            }
+        Returns:
+            作成されたメモリのIDリスト（保存に失敗した場合は空）
+        """
+        if not entries:
+            return []
 
-            if embedding:
-                data["embedding"] = embedding
+        rows = []
+        for entry in entries:
+            memory_type = entry.get("memory_type", "fact")
+            if memory_type not in MEMORY_TYPES:
+                print(f"[LongTermMemory] 不正な記憶タイプ: {memory_type}")
+                memory_type = "fact"
 
-            result = self._supabase.table("long_term_memory").insert(data).execute()
+            rows.append({
+                "user_id": self.user_id,
+                "content": entry["content"],
+                "memory_type": memory_type,
+                "importance": min(1.0, max(0.0, entry.get("importance", 0.5))),
+                "source_mid_term_id": entry.get("source_mid_term_id"),
+                # 一括INSERTは全行のキーを揃える必要があるので、ベクトルなしは明示的に NULL
+                "embedding": None,
+            })
+
+        # 検索対象にする重要度の記憶だけをベクトル化（まとめて1リクエスト）
+        to_embed = [row for row in rows if row["importance"] >= EMBED_IMPORTANCE_THRESHOLD]
+        if to_embed:
+            try:
+                embeddings = embedding_cache.embed_many(
+                    [row["content"] for row in to_embed], _llm().embed_batch, EMBEDDING_MODEL
+                )
+                for row, embedding in zip(to_embed, embeddings):
+                    if embedding is not None:
+                        row["embedding"] = _vector_literal(embedding)
+            except Exception as e:
+                print(f"[LongTermMemory] Embedding生成エラー: {e}")
 
-            return result.data[0]["id"] if result.data else None
+        try:
+            result = self._supabase.table("long_term_memory").insert(rows).execute()
+            return [r["id"] for r in result.data] if result.data else []
         except Exception as e:
             print(f"[LongTermMemory] 保存エラー: {e}")
-            return None
+            return []
 
     def search(self, query: str, n_results: int = 5, min_importance: float = 0.0) -> List[LongTermMemoryEntry]:
         """
@@ -113,14 +172,14 @@ class LongTermMemoryManager:
         """
         try:
             # クエリをベクトル化
-            query_embedding = self.llm_client.embed(query)
+            query_embedding = embedding_cache.embed(query, _llm().embed_batch, EMBEDDING_MODEL)
 
             # Supabaseのベクトル検索（RPC関数を使用）
             # match_long_term_memory関数はSupabaseで別途作成が必要
             result = self._supabase.client.rpc(
                 "match_long_term_memory",
                 {
-                    "query_embedding": query_embedding,
+                    "query_embedding": _vector_literal(query_embedding),
                     "match_user_id": self.user_id,
                     "match_count": n_results,
                     "min_importance": min_importance
@@ -145,7 +204,7 @@ class LongTermMemoryManager:
         """ベクトル検索が使えない場合のフォールバック"""
         try:
             result = self._supabase.table("long_term_memory") \
-                .select("*") \
+                .select(_ENTRY_COLUMNS) \
                 .eq("user_id", self.user_id) \
                 .gte("importance", min_importance) \
                 .order("importance", desc=True) \
@@ -161,7 +220,7 @@ class LongTermMemoryManager:
         """タイプ別に記憶を取得"""
         try:
             result = self._supabase.table("long_term_memory") \
-                .select("*") \
+                .select(_ENTRY_COLUMNS) \
                 .eq("user_id", self.user_id) \
                 .eq("memory_type", memory_type) \
                 .order("importance", desc=True) \
@@ -177,7 +236,7 @@ class LongTermMemoryManager:
         """全記憶を取得"""
         try:
             result = self._supabase.table("long_term_memory") \
-                .select("*") \
+                .select(_ENTRY_COLUMNS) \
                 .eq("user_id", self.user_id) \
                 .order("importance", desc=True) \
                 .limit(limit) \
@@ -188,18 +247,60 @@ class LongTermMemoryManager:
             print(f"[LongTermMemory] 全取得エラー: {e}")
             return []
 
+    def count(self) -> int:
+        """記憶の件数を取得（行は転送せず件数だけを受け取る）"""
+        try:
+            result = self._supabase.table("long_term_memory") \
+                .select("id", count="exact", head=True) \
+                .eq("user_id", self.user_id) \
+                .execute()
+
+            return result.count or 0
+        except Exception as e:
+            print(f"[LongTermMemory] 件数取得エラー: {e}")
+            return 0
+
     def update_importance(self, memory_id: str, new_importance: float) -> bool:
-        """重要度を更新"""
+        """重要度を更新（0.0〜1.0 への丸めはSQL関数側で行う）"""
+        try:
+            self._supabase.client.rpc(
+                "set_long_term_memory_importance",
+                {
+                    "match_user_id": self.user_id,
+                    "memory_id": memory_id,
+                    "new_importance": new_importance,
+                }
+            ).execute()
+        except Exception as e:
+            print(f"[LongTermMemory] 重要度更新エラー: {e}")
+            return False
+
+        # 閾値未満で保存された記憶はベクトルを持たないので、閾値を超えたらここでベクトル化する
+        if new_importance >= EMBED_IMPORTANCE_THRESHOLD:
+            self._embed_if_missing(memory_id)
+        return True
+
+    def _embed_if_missing(self, memory_id: str) -> None:
+        """embedding が NULL の記憶をベクトル化して保存する（ベクトル検索の対象にする）"""
         try:
+            result = self._supabase.table("long_term_memory") \
+                .select("content") \
+                .eq("id", memory_id) \
+                .eq("user_id", self.user_id) \
+                .is_("embedding", "null") \
+                .maybe_single() \
+                .execute()
+            if not result or not result.data:
+                return  # ベクトル化済み、または該当なし
+
+            embedding = embedding_cache.embed(result.data["content"], _llm().embed_batch, EMBEDDING_MODEL)
             self._supabase.table("long_term_memory") \
-                .update({"importance": min(1.0, max(0.0, new_importance))}) \
+                .update({"embedding": _vector_literal(embedding)}) \
                 .eq("id", memory_id) \
                 .eq("user_id", self.user_id) \
                 .execute()
-            return True
         except Exception as e:
-            print(f"[LongTermMemory] 重要度更新エラー: {e}")
-            return False
+            print(f"[LongTermMemory] Embedding生成エラー: {e}")
 
     def decay_old_memories(self) -> int:
         """
@@ -208,27 +309,19 @@ class LongTermMemoryManager:
         Returns:
             減衰させた記憶の数
         """
-        threshold_date = (datetime.utcnow() - timedelta(days=DECAY_DAYS)).isoformat()
-
         try:
-            # 古い記憶を取得
-            result = self._supabase.table("long_term_memory") \
-                .select("id, importance") \
-                .eq("user_id", self.user_id) \
-                .lt("last_accessed_at", threshold_date) \
-                .execute()
+            # 減衰・削除はSupabase側の1つのSQL関数でまとめて行う（行ごとの往復をしない）
+            result = self._supabase.client.rpc(
+                "decay_long_term_memory",
+                {
+                    "match_user_id": self.user_id,
+                    "decay_days": DECAY_DAYS,
+                    "decay_amount": DECAY_AMOUNT,
+                    "min_importance": MIN_IMPORTANCE,
+                }
+            ).execute()
 
-            decayed_count = 0
-            for memory in result.data:
-                new_importance = memory["importance"] - DECAY_AMOUNT
-                if new_importance < MIN_IMPORTANCE:
-                    # 重要度が閾値以下なら削除
-                    self.delete(memory["id"])
-                else:
-                    self.update_importance(memory["id"], new_importance)
-                decayed_count += 1
-
-            return decayed_count
+            return result.data or 0
         except Exception as e:
             print(f"[LongTermMemory] 減衰処理エラー: {e}")
             return 0
@@ -260,24 +353,28 @@ class LongTermMemoryManager:
 
     def _update_access_time(self, memory_ids: List[str]) -> None:
         """アクセス時間を更新"""
+        if not memory_ids:
+            return
         try:
-            for memory_id in memory_ids:
-                self._supabase.table("long_term_memory") \
-                    .update({"last_accessed_at": datetime.utcnow().isoformat()}) \
-                    .eq("id", memory_id) \
-                    .execute()
+            # 1回のUPDATEでまとめて更新する
+            self._supabase.table("long_term_memory") \
+                .update({"last_accessed_at": datetime.utcnow().isoformat()}) \
+                .in_("id", memory_ids) \
+                .eq("user_id", self.user_id) \
+                .execute()
         except Exception as e:
             print(f"[LongTermMemory] アクセス時間更新エラー: {e}")
 
     def _to_entry(self, data: Dict) -> LongTermMemoryEntry:
-        """DBレコードをLongTermMemoryEntryに変換"""
+        """DBレコードをLongTermMemoryEntryに変換（行ごとに呼ばれるので位置引数で組み立てる）"""
+        get = data.get
         return LongTermMemoryEntry(
-            id=data["id"],
-            user_id=data["user_id"],
-            content=data["content"],
-            memory_type=data.get("memory_type", "fact"),
-            importance=data.get("importance", 0.5),
-            source_mid_term_id=data.get("source_mid_term_id"),
-            created_at=data.get("created_at", ""),
-            last_accessed_at=data.get("last_accessed_at", "")
+            data["id"],
+            data["user_id"],
+            data["content"],
+            get("memory_type", "fact"),
+            get("importance", 0.5),
+            get("source_mid_term_id"),
+            get("created_at", ""),
+            get("last_accessed_at", ""),
         )
@@ -4,15 +4,32 @@
 """
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
 from .short_term import ShortTermMemory, MAX_TURNS
 from .mid_term import MidTermMemoryManager
 from .long_term import LongTermMemoryManager
+from .supabase_client import SupabaseClient, get_supabase
 
+# 中期・長期記憶への独立したSupabase問い合わせを並行させるスレッド数
+RETRIEVE_MAX_WORKERS = 4
 
-@dataclass
+# スレッドは最初の submit 時に起動される（プロセス内で共有）
+_retrieve_pool = ThreadPoolExecutor(
+    max_workers=RETRIEVE_MAX_WORKERS, thread_name_prefix="memory-retrieve"
+)
+
+# 要約コンテキストの見出し（RPCの bucket 名, 見出し）。この順で並べる
+_SUMMARY_SECTIONS = (
+    ("mid_recent", "【過去の会話要約】"),
+    ("fact", "【ユーザーについての事実】"),
+    ("emotion", "【感情的に重要な出来事】"),
+)
+
+
+@dataclass(slots=True)
 class RetrievedMemory:
     """取得された記憶"""
     content: str
@@ -29,11 +46,18 @@ class HierarchicalMemory:
     - 長期記憶: 重要な事実・感情的イベント（ベクトル検索可能）
     """
 
-    def __init__(self, user_id: str, session_id: Optional[str] = None):
+    def __init__(
+        self,
+        user_id: str,
+        session_id: Optional[str] = None,
+        client: Optional[SupabaseClient] = None,
+    ):
         self.user_id = user_id
-        self.short_term = ShortTermMemory(user_id, session_id)
-        self.mid_term = MidTermMemoryManager(user_id)
-        self.long_term = LongTermMemoryManager(user_id)
+        # 全階層で同じクライアント（＝同じHTTP接続プール）を使う
+        self._supabase = client or get_supabase()
+        self.short_term = ShortTermMemory(user_id, session_id, supabase=self._supabase)
+        self.mid_term = MidTermMemoryManager(user_id, supabase=self._supabase)
+        self.long_term = LongTermMemoryManager(user_id, supabase=self._supabase)
 
     @property
     def session_id(self) -> str:
@@ -92,13 +116,18 @@ class HierarchicalMemory:
 
         if result:
             # 長期記憶候補があれば保存
-            for candidate in result.get("long_term_candidates", []):
-                self.long_term.save(
-                    content=candidate["content"],
-                    memory_type=candidate["memory_type"],
-                    importance=candidate["importance"],
-                    source_mid_term_id=result.get("mid_term_id")
-                )
+            candidates = result.get("long_term_candidates", [])
+            if candidates:
+                mid_term_id = result.get("mid_term_id")
+                self.long_term.save_many([
+                    {
+                        "content": candidate["content"],
+                        "memory_type": candidate["memory_type"],
+                        "importance": candidate["importance"],
+                        "source_mid_term_id": mid_term_id,
+                    }
+                    for candidate in candidates
+                ])
 
             # 短期記憶をクリア
             self.short_term.clear()
@@ -127,8 +156,12 @@ class HierarchicalMemory:
         """
         memories: List[RetrievedMemory] = []
 
+        # 長期記憶のベクトル検索は別スレッドで走らせ、その間に中期記憶を取得する
+        long_term_future = _retrieve_pool.submit(self.long_term.search, query, n_results)
+        mid_term_results = self.mid_term.get_important_summaries(threshold=0.5)
+        long_term_results = long_term_future.result()
+
         # 長期記憶からベクトル検索
-        long_term_results = self.long_term.search(query, n_results=n_results)
         for entry in long_term_results:
             memories.append(RetrievedMemory(
                 content=entry.content,
@@ -137,7 +170,6 @@ class HierarchicalMemory:
             ))
 
         # 中期記憶から重要な要約を取得
-        mid_term_results = self.mid_term.get_important_summaries(threshold=0.5)
         for entry in mid_term_results[:3]:  # 最大3件
             memories.append(RetrievedMemory(
                 content=entry.summary,
@@ -156,31 +188,26 @@ class HierarchicalMemory:
         Returns:
             コンテキスト文字列
         """
-        lines = []
-
-        # 直近の中期記憶（要約）
-        recent_summaries = self.mid_term.get_recent_summaries(limit=3)
-        if recent_summaries:
-            lines.append("【過去の会話要約】")
-            for s in recent_summaries:
-                lines.append(f"- {s.summary}")
-
-        # 重要な長期記憶
-        important_memories = self.long_term.get_all(limit=10)
-        facts = [m for m in important_memories if m.memory_type == "fact"]
-        emotions = [m for m in important_memories if m.memory_type == "emotion"]
-
-        if facts:
-            lines.append("\n【ユーザーについての事実】")
-            for f in facts[:5]:
-                lines.append(f"- {f.content}")
-
-        if emotions:
-            lines.append("\n【感情的に重要な出来事】")
-            for e in emotions[:3]:
-                lines.append(f"- {e.content}")
-
-        return "\n".join(lines)
+        try:
+            # 直近の要約・事実・感情的出来事をSupabase側の1つのSQL関数でまとめて取得する
+            result = self._supabase.client.rpc(
+                "get_memory_summary_context", {"match_user_id": self.user_id}
+            ).execute()
+            rows = result.data or []
+        except Exception as e:
+            print(f"[HierarchicalMemory] 要約コンテキスト取得エラー: {e}")
+            rows = []
+
+        buckets: Dict[str, List[str]] = {}
+        for row in rows:
+            buckets.setdefault(row["bucket"], []).append(row["content"])
+
+        # 見出しごとのブロックを空行区切りでつなぐ
+        return "\n\n".join(
+            heading + "".join(f"\n- {content}" for content in buckets[bucket])
+            for bucket, heading in _SUMMARY_SECTIONS
+            if bucket in buckets
+        )
 
     def save_fact(self, content: str, importance: float = 0.7) -> Optional[str]:
         """事実を長期記憶に直接保存"""
@@ -200,12 +227,18 @@ class HierarchicalMemory:
         self.mid_term.clear()
         self.long_term.clear()
 
+    def flush(self) -> None:
+        """バックグラウンドで保存中の短期記憶を書き込み終えるまで待つ（セッション終了時など）"""
+        self.short_term.flush()
+
     def clear_session(self) -> None:
         """現在のセッション（短期記憶）のみクリア"""
         self.short_term.clear()
 
     def get_stats(self) -> Dict:
         """記憶の統計情報を取得"""
+        long_term_count = _retrieve_pool.submit(self.long_term.count)
+        mid_term_count = self.mid_term.count()
         return {
             "short_term": {
                 "current_turn": self.short_term.current_turn,
@@ -213,9 +246,9 @@ class HierarchicalMemory:
                 "session_id": self.session_id
             },
             "mid_term": {
-                "count": len(self.mid_term.get_all())
+                "count": mid_term_count
             },
             "long_term": {
-                "count": len(self.long_term.get_all())
+                "count": long_term_count.result()
             }
         }
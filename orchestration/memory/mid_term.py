@@ -8,14 +8,14 @@ import uuid
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
-from .supabase_client import get_supabase
+from .supabase_client import SupabaseClient, get_supabase
 from .summarizer import summarize_conversation, extract_long_term_memories
 
 
 PROMOTION_THRESHOLD = 0.7  # 長期記憶への昇格閾値
 
 
-@dataclass
+@dataclass(slots=True)
 class MidTermMemory:
     """中期記憶のエントリ"""
     id: str
@@ -31,9 +31,9 @@ class MidTermMemory:
 class MidTermMemoryManager:
     """中期記憶管理クラス"""
 
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, supabase: Optional[SupabaseClient] = None):
         self.user_id = user_id
-        self._supabase = get_supabase()
+        self._supabase = supabase or get_supabase()
 
     def create_from_short_term(
         self,
@@ -138,6 +138,19 @@ class MidTermMemoryManager:
             print(f"[MidTermMemory] 取得エラー: {e}")
             return []
 
+    def count(self) -> int:
+        """記憶の件数を取得（行は転送せず件数だけを受け取る）"""
+        try:
+            result = self._supabase.table("mid_term_memory") \
+                .select("id", count="exact", head=True) \
+                .eq("user_id", self.user_id) \
+                .execute()
+
+            return result.count or 0
+        except Exception as e:
+            print(f"[MidTermMemory] 件数取得エラー: {e}")
+            return 0
+
     def delete(self, memory_id: str) -> bool:
         """中期記憶を削除"""
         try:
@@ -164,14 +177,15 @@ class MidTermMemoryManager:
             return False
 
     def _to_memory(self, data: Dict) -> MidTermMemory:
-        """DBレコードをMidTermMemoryに変換"""
+        """DBレコードをMidTermMemoryに変換（行ごとに呼ばれるので位置引数で組み立てる）"""
+        get = data.get
         return MidTermMemory(
-            id=data["id"],
-            user_id=data["user_id"],
-            summary=data["summary"],
-            importance=data.get("importance", 0.5),
-            source_session_id=data.get("source_session_id", ""),
-            turn_start=data.get("turn_start", 0),
-            turn_end=data.get("turn_end", 0),
-            created_at=data.get("created_at", "")
+            data["id"],
+            data["user_id"],
+            data["summary"],
+            get("importance", 0.5),
+            get("source_session_id", ""),
+            get("turn_start", 0),
+            get("turn_end", 0),
+            get("created_at", ""),
         )
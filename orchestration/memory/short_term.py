@@ -5,17 +5,35 @@
 """
 from __future__ import annotations
 
+import atexit
+import logging
+import queue
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Deque, Dict, List, Optional
 from dataclasses import dataclass
 
-from .supabase_client import get_supabase
+from .supabase_client import SupabaseClient, get_supabase
 
 
 MAX_TURNS = 15  # 短期記憶の最大ターン数
+MAX_CACHED_MESSAGES = MAX_TURNS * 4  # プロセス内にキャッシュするメッセージ数の上限
+TURN_CACHE_MAX_ENTRIES = 10_000  # ターン番号をキャッシュするセッション数の上限
+TURN_CACHE_TTL_SEC = 300  # ターン番号キャッシュの有効期限（秒）
+WRITE_BATCH_SIZE = 32  # 1回のINSERTにまとめる最大行数
+# 最初の1行を受け取ってから、後続（同じターンの応答など）をまとめるために待つ最大時間（秒）
+WRITE_BATCH_WAIT_SEC = 0.01
+WRITE_BATCH_ATTEMPTS = 2  # 一括INSERTの試行回数（失敗し続けたら1行ずつ書き込む）
+WRITE_RETRY_DELAY_SEC = 0.1  # 一括INSERTの再試行までの待ち時間（秒）
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class ShortTermMessage:
     """短期記憶のメッセージ"""
     id: str
@@ -27,18 +45,179 @@ class ShortTermMessage:
     created_at: str
 
 
+class _TurnCache:
+    """(user_id, session_id) -> 現在のターン番号 のTTL付きLRU（プロセス内で共有）"""
+
+    def __init__(self, max_entries: int = TURN_CACHE_MAX_ENTRIES, ttl_sec: float = TURN_CACHE_TTL_SEC):
+        self._max_entries = max_entries
+        self._ttl_sec = ttl_sec
+        # key -> (期限の monotonic 秒, ターン番号)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: tuple, turn: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_sec, turn)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_turn_cache = _TurnCache()
+
+
+class _MessageWriter:
+    """短期記憶のINSERTをバックグラウンドでまとめて行うライター（プロセス内で共有）
+
+    未書き込みの行数はセッションごとに数え、flush は呼び出し元のセッションの分だけを待つ
+    （他ユーザーの書き込みが詰まっていても読み出しを待たせない）。
+    """
+
+    def __init__(self):
+        # (Supabaseクライアント, 行) を積む
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # (user_id, session_id) -> 未書き込みの行数。0になったら削除して _done に通知する
+        self._pending: Dict[tuple, int] = {}
+        self._done = threading.Condition(self._lock)
+
+    @staticmethod
+    def _session_key(row: Dict) -> tuple:
+        return (row["user_id"], row["session_id"])
+
+    def enqueue(self, supabase, row: Dict) -> None:
+        key = self._session_key(row)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name="short-term-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((supabase, row))
+
+    def _worker(self) -> None:
+        """キューから最大 WRITE_BATCH_SIZE 行ずつ取り出し、クライアントごとに1回の insert で書き込む"""
+        while True:
+            batch = [self._queue.get()]
+            # 待ち時間は最初の1行からの合計で区切る（1行ごとに延長しない）
+            deadline = time.monotonic() + WRITE_BATCH_WAIT_SEC
+            try:
+                while len(batch) < WRITE_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                pass
+            try:
+                by_client: Dict[int, tuple] = {}
+                for supabase, row in batch:
+                    by_client.setdefault(id(supabase), (supabase, []))[1].append(row)
+                for supabase, rows in by_client.values():
+                    self._insert(supabase, rows)
+            finally:
+                self._mark_done(row for _, row in batch)
+
+    @staticmethod
+    def _insert(supabase, rows: List[Dict]) -> None:
+        """rows を1回の insert で書き込む。失敗したら再試行し、それでも駄目なら1行ずつ書き込む"""
+        for attempt in range(WRITE_BATCH_ATTEMPTS):
+            try:
+                supabase.table("short_term_memory").insert(rows).execute()
+                return
+            except Exception:
+                logger.warning(
+                    "[ShortTermMemory] 一括保存エラー（%d/%d回目, %d行）",
+                    attempt + 1, WRITE_BATCH_ATTEMPTS, len(rows), exc_info=True,
+                )
+                if attempt + 1 < WRITE_BATCH_ATTEMPTS:
+                    time.sleep(WRITE_RETRY_DELAY_SEC)
+
+        # 一部の行だけが原因なら、残りの行は保存できるよう1行ずつ書き込む
+        for row in rows:
+            try:
+                supabase.table("short_term_memory").insert(row).execute()
+            except Exception:
+                logger.exception(
+                    "[ShortTermMemory] 保存エラー（破棄: user_id=%s session_id=%s turn=%s）",
+                    row["user_id"], row["session_id"], row["turn_number"],
+                )
+
+    def _mark_done(self, rows) -> None:
+        """書き込み（または破棄）が済んだ行をセッションごとの未書き込み数から引く"""
+        with self._lock:
+            for row in rows:
+                key = self._session_key(row)
+                remaining = self._pending.get(key, 0) - 1
+                if remaining > 0:
+                    self._pending[key] = remaining
+                else:
+                    self._pending.pop(key, None)
+            self._done.notify_all()
+
+    def flush(self, key: Optional[tuple] = None) -> None:
+        """key のセッション（None なら全セッション）の未書き込み行がなくなるまで待つ"""
+        with self._lock:
+            if key is None:
+                self._done.wait_for(lambda: not self._pending)
+            else:
+                self._done.wait_for(lambda: key not in self._pending)
+
+
+_writer = _MessageWriter()
+atexit.register(_writer.flush)
+
+
 class ShortTermMemory:
     """短期記憶管理クラス"""
 
-    def __init__(self, user_id: str, session_id: Optional[str] = None):
+    def __init__(
+        self,
+        user_id: str,
+        session_id: Optional[str] = None,
+        supabase: Optional[SupabaseClient] = None,
+    ):
         self.user_id = user_id
         self.session_id = session_id or str(uuid.uuid4())
-        self._supabase = get_supabase()
+        self._supabase = supabase or get_supabase()
         self._current_turn = 0
-        self._load_current_turn()
+        # 直近メッセージのキャッシュ。新規セッションは空で確定、
+        # 既存セッションは初回の get_messages でDBから読み込む。
+        self._messages: Optional[Deque[Dict[str, str]]] = (
+            None if session_id else deque(maxlen=MAX_CACHED_MESSAGES)
+        )
+        # 新規セッションはDBに行がないので、ターン番号の問い合わせは不要
+        if session_id:
+            self._load_current_turn()
+
+    @property
+    def _turn_key(self) -> tuple:
+        return (self.user_id, self.session_id)
 
     def _load_current_turn(self):
-        """現在のターン番号をDBから取得"""
+        """現在のターン番号を取得（キャッシュになければDBから）"""
+        cached = _turn_cache.get(self._turn_key)
+        if cached is not None:
+            self._current_turn = cached
+            return
+
         try:
             result = self._supabase.table("short_term_memory") \
                 .select("turn_number") \
@@ -50,6 +229,7 @@ class ShortTermMemory:
 
             if result.data:
                 self._current_turn = result.data[0]["turn_number"]
+            _turn_cache.set(self._turn_key, self._current_turn)
         except Exception as e:
             print(f"[ShortTermMemory] ターン取得エラー: {e}")
             self._current_turn = 0
@@ -64,20 +244,27 @@ class ShortTermMemory:
         # userメッセージでターン番号を増やす
         if role == "user":
             self._current_turn += 1
+            _turn_cache.set(self._turn_key, self._current_turn)
 
-        try:
-            self._supabase.table("short_term_memory").insert({
-                "user_id": self.user_id,
-                "role": role,
-                "content": content,
-                "turn_number": self._current_turn,
-                "session_id": self.session_id,
-            }).execute()
-        except Exception as e:
-            print(f"[ShortTermMemory] 保存エラー: {e}")
+        # DBへの書き込みはバックグラウンドで行い、応答を待たない。
+        # 同じINSERTにまとめても発話順が保たれるよう created_at はここで付ける
+        _writer.enqueue(self._supabase, {
+            "user_id": self.user_id,
+            "role": role,
+            "content": content,
+            "turn_number": self._current_turn,
+            "session_id": self.session_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        if self._messages is not None:
+            self._messages.append({"role": role, "content": content})
 
         return self._current_turn
 
+    def flush(self) -> None:
+        """このセッションの未書き込みのメッセージをDBに反映するまで待つ"""
+        _writer.flush(self._turn_key)
+
     def get_messages(self, limit: int = MAX_TURNS) -> List[Dict[str, str]]:
         """
         直近のメッセージを取得する。
@@ -85,23 +272,41 @@ class ShortTermMemory:
         Returns:
             [{"role": "user", "content": "..."}, ...]
         """
+        count = limit * 2
+        if count > MAX_CACHED_MESSAGES:
+            # キャッシュに収まらない件数はDBから直接取得
+            return self._fetch_messages(count) or []
+
+        if self._messages is None:
+            messages = self._fetch_messages(MAX_CACHED_MESSAGES)
+            if messages is None:
+                return []
+            self._messages = deque(messages, maxlen=MAX_CACHED_MESSAGES)
+
+        start = max(len(self._messages) - count, 0)
+        return list(islice(self._messages, start, None))
+
+    def _fetch_messages(self, count: int) -> Optional[List[Dict[str, str]]]:
+        """直近 count 件のメッセージを古い順でDBから取得（エラー時は None）"""
+        self.flush()
         try:
             result = self._supabase.table("short_term_memory") \
-                .select("role, content, turn_number") \
+                .select("role, content") \
                 .eq("user_id", self.user_id) \
                 .eq("session_id", self.session_id) \
-                .order("turn_number", desc=False) \
-                .order("created_at", desc=False) \
-                .limit(limit * 2) \
+                .order("turn_number", desc=True) \
+                .order("created_at", desc=True) \
+                .limit(count) \
                 .execute()
 
-            return [{"role": r["role"], "content": r["content"]} for r in result.data]
+            return [{"role": r["role"], "content": r["content"]} for r in reversed(result.data)]
         except Exception as e:
             print(f"[ShortTermMemory] 取得エラー: {e}")
-            return []
+            return None
 
     def get_all_for_summarization(self) -> List[Dict]:
         """要約用に全メッセージを取得"""
+        self.flush()
         try:
             result = self._supabase.table("short_term_memory") \
                 .select("*") \
@@ -118,6 +323,7 @@ class ShortTermMemory:
 
     def clear(self):
         """セッションの短期記憶をクリア"""
+        self.flush()
         try:
             self._supabase.table("short_term_memory") \
                 .delete() \
@@ -125,6 +331,8 @@ class ShortTermMemory:
                 .eq("session_id", self.session_id) \
                 .execute()
             self._current_turn = 0
+            _turn_cache.set(self._turn_key, 0)
+            self._messages = deque(maxlen=MAX_CACHED_MESSAGES)
         except Exception as e:
             print(f"[ShortTermMemory] クリアエラー: {e}")
 
@@ -4,19 +4,75 @@
 """
 from __future__ import annotations
 
+import copy
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, List, Optional, Tuple
 
-from .supabase_client import get_supabase
+from .supabase_client import SupabaseClient, get_supabase
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:  # 無ければ境界線ごとの部分一致ループで判定する
+    ahocorasick = None
 
 
 # 分類の最小confidence閾値
 MIN_CONFIDENCE_THRESHOLD = 0.6
 
+# プロフィールキャッシュ（プロセス内で共有）の設定
+PROFILE_CACHE_TTL_SEC = 60
+PROFILE_CACHE_MAX_ENTRIES = 1024
+
+
+class _ProfileCache:
+    """user_id -> 生のプロフィール dict のTTL付きLRU
+
+    呼び出し側が書き換えても共有中の値が壊れないよう、出し入れはコピーで行う。
+    """
+
+    def __init__(self, max_entries: int = PROFILE_CACHE_MAX_ENTRIES, ttl_sec: float = PROFILE_CACHE_TTL_SEC):
+        self._max_entries = max_entries
+        self._ttl_sec = ttl_sec
+        # user_id -> (期限の monotonic 秒, プロフィール)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return copy.deepcopy(entry[1])
+
+    def set(self, user_id: str, profile: Dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self._ttl_sec, copy.deepcopy(profile))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
 
-@dataclass
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_profile_cache = _ProfileCache()
+
+
+@dataclass(slots=True)
 class UserProfile:
     """ユーザープロフィール"""
     user_id: str
@@ -41,7 +97,7 @@ class UserProfile:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Promise:
     """約束"""
     id: str
@@ -62,7 +118,7 @@ class Promise:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Boundary:
     """境界線（NG）"""
     id: str
@@ -90,9 +146,11 @@ class StructuredMemoryManager:
     プロフィール、約束、境界線を管理する。
     """
 
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, supabase: Optional[SupabaseClient] = None):
         self.user_id = user_id
-        self._supabase = get_supabase()
+        self._supabase = supabase or get_supabase()
+        # check_boundary 用: (重要度順の境界線, Aho-Corasick オートマトン or None)
+        self._boundary_index: Optional[Tuple[List[Boundary], Any]] = None
 
     # ==================== Profile ====================
 
@@ -107,38 +165,59 @@ class StructuredMemoryManager:
         Returns:
             成功したかどうか
         """
+        return self.save_profile_fields([(field_name, value)])
+
+    def save_profile_fields(self, updates: List[Tuple[str, Any]]) -> bool:
+        """
+        複数のプロフィールフィールドをまとめて保存する（取得1回 + upsert 1回）。
+
+        Args:
+            updates: (フィールド名, 値) のリスト。フィールド名は save_profile と同じ
+
+        Returns:
+            成功したかどうか
+        """
+        if not updates:
+            return True
+
         try:
             # 現在のプロフィールを取得
             current = self._get_raw_profile()
 
-            # フィールドに応じて更新
-            if field_name == "hobby":
-                # 趣味は配列に追加
-                hobbies = current.get("hobbies", []) or []
-                if value not in hobbies:
-                    hobbies.append(value)
-                current["hobbies"] = hobbies
-            elif field_name.startswith("preference_"):
-                # preference_food -> preferences["food"]
-                pref_key = field_name.replace("preference_", "")
-                preferences = current.get("preferences", {}) or {}
-                preferences[pref_key] = value
-                current["preferences"] = preferences
-            else:
-                # その他は直接更新
-                current[field_name] = value
+            for field_name, value in updates:
+                self._merge_profile_field(current, field_name, value)
 
             # user_idを設定
             current["user_id"] = self.user_id
 
             # upsert
             self._supabase.table("user_profiles").upsert(current).execute()
+            _profile_cache.set(self.user_id, current)
             return True
 
         except Exception as e:
             print(f"[StructuredMemory] プロフィール保存エラー: {e}")
             return False
 
+    @staticmethod
+    def _merge_profile_field(current: Dict, field_name: str, value: Any) -> None:
+        """プロフィールの dict に1フィールド分の更新を反映する"""
+        if field_name == "hobby":
+            # 趣味は配列に追加
+            hobbies = current.get("hobbies", []) or []
+            if value not in hobbies:
+                hobbies.append(value)
+            current["hobbies"] = hobbies
+        elif field_name.startswith("preference_"):
+            # preference_food -> preferences["food"]
+            pref_key = field_name.replace("preference_", "")
+            preferences = current.get("preferences", {}) or {}
+            preferences[pref_key] = value
+            current["preferences"] = preferences
+        else:
+            # その他は直接更新
+            current[field_name] = value
+
     def get_profile(self) -> UserProfile:
         """
         プロフィールを取得する。
@@ -159,17 +238,32 @@ class StructuredMemoryManager:
         )
 
     def _get_raw_profile(self) -> Dict:
-        """生のプロフィールデータを取得"""
+        """生のプロフィールデータを取得（キャッシュになければDBから）"""
+        cached = _profile_cache.get(self.user_id)
+        if cached is not None:
+            return cached
+
         try:
+            # maybe_single は行がなければ例外ではなく None を返す（初回ユーザーで例外を発生させない）
             result = self._supabase.table("user_profiles") \
                 .select("*") \
                 .eq("user_id", self.user_id) \
-                .single() \
+                .maybe_single() \
                 .execute()
-            return result.data or {}
-        except Exception:
+        except Exception as e:
+            # 通信エラー等はキャッシュしない
+            print(f"[StructuredMemory] プロフィール取得エラー: {e}")
             return {}
 
+        data = (result.data if result is not None else None) or {}
+
+        _profile_cache.set(self.user_id, data)
+        return data
+
+    def reload(self) -> None:
+        """キャッシュ済みのプロフィールを破棄し、次回はDBから読み直す"""
+        _profile_cache.invalidate(self.user_id)
+
     # ==================== Promise ====================
 
     def save_promise(self, content: str, due_date: Optional[str] = None) -> Optional[str]:
@@ -287,6 +381,7 @@ class StructuredMemoryManager:
             }
 
             result = self._supabase.table("boundaries").insert(data).execute()
+            self._boundary_index = None
             return result.data[0]["id"] if result.data else None
 
         except Exception as e:
@@ -323,14 +418,38 @@ class StructuredMemoryManager:
         Returns:
             該当する境界線（なければNone）
         """
-        boundaries = self.get_boundaries()
+        boundaries, automaton = self._get_boundary_index()
 
-        for boundary in boundaries:
-            # 単純な部分一致チェック
-            if boundary.content in text:
-                return boundary
+        if automaton is None:
+            for boundary in boundaries:
+                # 単純な部分一致チェック
+                if boundary.content and boundary.content in text:
+                    return boundary
+            return None
 
-        return None
+        # 1回の走査で全境界線の出現を拾い、最も重要度の高いもの（添字が最小）を返す
+        best: Optional[int] = None
+        for _, index in automaton.iter(text):
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return boundaries[best] if best is not None else None
+
+    def _get_boundary_index(self) -> Tuple[List[Boundary], Any]:
+        """境界線一覧と、その内容から作ったオートマトンを返す（save_boundary まで使い回す）"""
+        if self._boundary_index is None:
+            boundaries = self.get_boundaries()
+            automaton = None
+            if ahocorasick is not None:
+                automaton = ahocorasick.Automaton()
+                for index, boundary in enumerate(boundaries):
+                    # 同じ内容が複数あれば重要度の高い方（先に来る方）を残す
+                    if boundary.content and boundary.content not in automaton:
+                        automaton.add_word(boundary.content, index)
+                automaton.make_automaton()
+            self._boundary_index = (boundaries, automaton)
+        return self._boundary_index
 
     def _to_boundary(self, data: Dict) -> Boundary:
         """辞書からBoundaryに変換"""
@@ -378,9 +497,12 @@ class StructuredMemoryManager:
             "like": "hobby",  # likeもhobbyとして扱う
         }
 
-        for key, value in info.items():
-            if key in field_mapping and value:
-                self.save_profile(field_mapping[key], value)
+        # 複数フィールドでも取得・保存は1回ずつにまとめる
+        self.save_profile_fields([
+            (field_mapping[key], value)
+            for key, value in info.items()
+            if key in field_mapping and value
+        ])
 
     def _process_promise(self, info: Dict) -> None:
         """約束情報を処理"""
@@ -5,7 +5,6 @@
 from __future__ import annotations
 
 from typing import Dict, List, Optional
-import json
 
 
 def summarize_conversation(messages: List[Dict], llm_client=None) -> Dict:
@@ -33,8 +32,9 @@ def summarize_conversation(messages: List[Dict], llm_client=None) -> Dict:
         }
 
     if llm_client is None:
-        from ..llm_client import LLMClient
-        llm_client = LLMClient()
+        # 毎回 LLMClient() を作ると OpenAI クライアント（HTTP接続プール）が作り直されるため、
+        # モジュール共通のインスタンスを使い回す
+        from ..llm_client import llm_client
 
     # 会話をテキスト形式に変換
     conversation_text = _format_conversation(messages)
@@ -10,6 +10,28 @@ except ImportError:
     create_client = None
     Client = None
 
+try:
+    from supabase import ClientOptions
+except ImportError:  # 古い supabase-py には httpx_client を渡すオプションがない
+    ClientOptions = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore
+
+try:
+    import h2  # noqa: F401  httpx の HTTP/2 対応に必要
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Supabase へのHTTP接続プール設定（全メモリマネージャーで共有する）
+HTTP_TIMEOUT_SEC = 30.0
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 20
+HTTP_KEEPALIVE_EXPIRY_SEC = 300.0  # ターン間の待ち時間で接続を張り直さない程度に長めに保持
+
 
 class SupabaseClient:
     """Supabaseクライアントのシングルトン"""
@@ -35,7 +57,28 @@ class SupabaseClient:
         if not url or not key:
             raise ValueError("SUPABASE_URL と SUPABASE_ANON_KEY を .env に設定してください")
 
-        self._client = create_client(url, key)
+        self._client = create_client(url, key, **self._options_kwargs())
+
+    @staticmethod
+    def _options_kwargs() -> dict:
+        """create_client() に渡す共有 httpx_client（HTTP/2 + keepalive の接続プール）"""
+        if ClientOptions is None or httpx is None:
+            return {}
+        http = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=HTTP_TIMEOUT_SEC,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SEC,
+            ),
+        )
+        try:
+            return {"options": ClientOptions(httpx_client=http)}
+        except TypeError:
+            http.close()
+            return {}
 
     @property
     def client(self) -> Client:
@@ -12,20 +12,45 @@
 """
 from __future__ import annotations
 
+import atexit
+import hashlib
+import itertools
+import logging
+import queue
+import threading
+import time
 import uuid
 import warnings
-from dataclasses import dataclass
+from collections import OrderedDict
 from datetime import datetime
-from typing import List
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import chromadb
 from chromadb.config import Settings
 
 from ..settings import settings
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class MemoryItem:
+# バックグラウンド書き込みで1回の collection.add にまとめる最大件数
+WRITE_BATCH_SIZE = 32
+# 最初の1件を受け取ってから、後続をまとめるために待つ最大時間（秒）
+WRITE_BATCH_WAIT_SEC = 0.2
+
+# 記憶IDは「プロセス固有の接頭辞 + ミリ秒時刻 + 連番」で作る（毎回 os.urandom を呼ばない）。
+# 接頭辞があるので複数ワーカープロセスが同じ永続ストアに書いても衝突しない。
+_ID_PREFIX = uuid.uuid4().hex[:8]
+_id_counter = itertools.count()
+
+# 保持するユーザー別コレクションのハンドル数（LRUで古いものから破棄。データは消えない）
+MAX_USER_COLLECTIONS = 1024
+# 旧来の全ユーザー共有コレクション（初回アクセス時にユーザー別コレクションへ移す）
+LEGACY_COLLECTION_NAME = "idol_memories"
+# 共有コレクションから1回に移行する件数
+LEGACY_MIGRATION_BATCH = 500
+
+
+class MemoryItem(NamedTuple):
     text: str
     metadata: dict
     distance: float = 0.0
@@ -45,45 +70,189 @@ class MemorySystem:
         )
         # ChromaDB Client の初期化（データは data/chroma に永続化）
         self.client = chromadb.PersistentClient(path=str(settings.chroma_db_path))
-        self.collection = self.client.get_or_create_collection(name="idol_memories")
+        # 記憶はユーザーごとのコレクションに入れる（検索時に他ユーザーのベクトルを走査しない）。
+        # 共有コレクションに残る過去データは、ユーザーごとに初回アクセス時に移行する。
+        self.collection = self.client.get_or_create_collection(name=LEGACY_COLLECTION_NAME)
+        self._user_collections: "OrderedDict[str, object]" = OrderedDict()
+        self._collections_lock = threading.Lock()
+        # 共有コレクションから移行中のユーザーごとのロック（移行が済んだら破棄）
+        self._migration_locks: Dict[str, threading.Lock] = {}
+        # enqueue_save で積まれた (id, text, metadata)。書き込みスレッドがまとめて add する
+        self._write_queue: queue.Queue = queue.Queue()
+        self._write_thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def _collection_name(user_id: str) -> str:
+        """ユーザーIDから Chroma のコレクション名を作る（使える文字種・長さに収める）"""
+        return f"mem_{hashlib.sha256(user_id.encode()).hexdigest()[:32]}"
+
+    def _collection_for(self, user_id: str):
+        """ユーザー別コレクションを返す（ハンドルはLRUでキャッシュ）
+
+        ハンドルを開くたびに共有コレクションに残ったそのユーザーの記憶を移行する。
+        移行はユーザーごとのロックで行い、全体のロックはキャッシュの参照・登録にだけ使う
+        （過去データの多いユーザーの移行中も、他ユーザーの検索・書き込みを止めない）。
+        移行に失敗した場合はハンドルをキャッシュせず、次回のアクセスで再試行する。
+        """
+        collection = self._cached_collection(user_id)
+        if collection is not None:
+            return collection
+        with self._collections_lock:
+            user_lock = self._migration_locks.setdefault(user_id, threading.Lock())
+
+        with user_lock:
+            # 待っている間に他のスレッドが移行を終えていればそれを使う
+            collection = self._cached_collection(user_id)
+            if collection is not None:
+                return collection
+            collection = self.client.get_or_create_collection(
+                name=self._collection_name(user_id)
+            )
+            if not self._migrate_legacy(user_id, collection):
+                return collection
+            with self._collections_lock:
+                self._user_collections[user_id] = collection
+                while len(self._user_collections) > MAX_USER_COLLECTIONS:
+                    self._user_collections.popitem(last=False)
+                self._migration_locks.pop(user_id, None)
+            return collection
+
+    def _cached_collection(self, user_id: str):
+        """キャッシュ済みのハンドルを返す（なければ None）"""
+        with self._collections_lock:
+            collection = self._user_collections.get(user_id)
+            if collection is not None:
+                self._user_collections.move_to_end(user_id)
+            return collection
+
+    def _migrate_legacy(self, user_id: str, collection) -> bool:
+        """共有コレクションにあるユーザーの記憶をユーザー別コレクションへ移し、共有側から削除する
+
+        Embedding も一緒に移すので再ベクトル化はしない。upsert なので途中で失敗しても
+        再実行で重複しない。移行済み（または移行不要）なら True を返す。
+        """
+        try:
+            while True:
+                rows = self.collection.get(
+                    where={"user_id": user_id},
+                    limit=LEGACY_MIGRATION_BATCH,
+                    include=["documents", "metadatas", "embeddings"],
+                )
+                ids = rows["ids"]
+                if not ids:
+                    return True
+                collection.upsert(
+                    ids=ids,
+                    documents=rows["documents"],
+                    metadatas=rows["metadatas"],
+                    embeddings=rows["embeddings"],
+                )
+                self.collection.delete(ids=ids)
+        except Exception:
+            logger.exception("[MemorySystem] 共有コレクションからの移行エラー")
+            return False
+
+    def _query(self, user_id: str, query_text: str, n_results: int, include: List[str]) -> Dict:
+        """ユーザー別コレクションを検索する"""
+        return self._collection_for(user_id).query(
+            query_texts=[query_text],
+            n_results=n_results,
+            include=include,
+        )
+
+    @staticmethod
+    def _new_record(user_id: str, text: str, role: str, phase: str) -> Tuple[str, str, dict]:
+        """collection.add 用の (id, document, metadata) を作る"""
+        mem_id = f"{_ID_PREFIX}-{time.time_ns() // 1_000_000:x}-{next(_id_counter):x}"
+        return mem_id, text, {
+            "user_id": user_id,
+            "role": role,
+            "timestamp": datetime.now().isoformat(),
+            "phase": phase
+        }
 
     def save_memory(self, user_id: str, text: str, role: str, phase: str) -> None:
         """記憶を保存する。"""
-        mem_id = str(uuid.uuid4())
-        now_str = datetime.now().isoformat()
-
-        self.collection.add(
-            documents=[text],
-            metadatas=[{
-                "user_id": user_id,
-                "role": role,
-                "timestamp": now_str,
-                "phase": phase
-            }],
-            ids=[mem_id]
-        )
+        mem_id, doc, meta = self._new_record(user_id, text, role, phase)
+        self._collection_for(user_id).add(documents=[doc], metadatas=[meta], ids=[mem_id])
+
+    def enqueue_save(self, user_id: str, text: str, role: str, phase: str) -> None:
+        """記憶の保存をキューに積む（書き込みはバックグラウンドでまとめて行う）"""
+        self._write_queue.put(self._new_record(user_id, text, role, phase))
+        if self._write_thread is None:
+            with self._write_lock:
+                if self._write_thread is None:
+                    self._write_thread = threading.Thread(
+                        target=self._write_worker, name="memory-writer", daemon=True
+                    )
+                    self._write_thread.start()
+
+    def _write_worker(self) -> None:
+        """キューから最大 WRITE_BATCH_SIZE 件ずつ取り出し、ユーザーごとに1回の add で書き込む"""
+        while True:
+            batch = [self._write_queue.get()]
+            # 待ち時間は最初の1件からの合計で区切る（1件ごとに延長しない）
+            deadline = time.monotonic() + WRITE_BATCH_WAIT_SEC
+            try:
+                while len(batch) < WRITE_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._write_queue.get(timeout=remaining))
+            except queue.Empty:
+                pass
+            try:
+                by_user: Dict[str, List[Tuple[str, str, dict]]] = {}
+                for record in batch:
+                    by_user.setdefault(record[2]["user_id"], []).append(record)
+                for user_id, records in by_user.items():
+                    ids, docs, metas = zip(*records)
+                    self._collection_for(user_id).add(
+                        documents=list(docs), metadatas=list(metas), ids=list(ids)
+                    )
+            except Exception:
+                logger.exception("[MemorySystem] 記憶の保存エラー")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    def flush(self) -> None:
+        """キューに残っている記憶をすべて書き込むまで待つ"""
+        if self._write_thread is not None:
+            self._write_queue.join()
 
     def retrieve_memory(self, user_id: str, query_text: str, n_results: int = 3) -> List[MemoryItem]:
         """関連する記憶を検索する。"""
-        results = self.collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            where={"user_id": user_id}
-        )
+        results = self._query(user_id, query_text, n_results, ["documents", "metadatas", "distances"])
 
-        memories: List[MemoryItem] = []
-        if results["documents"]:
-            docs = results["documents"][0]
-            metas = results["metadatas"][0]
-            dists = results["distances"][0] if results["distances"] else [0.0] * len(docs)
+        if not results["documents"]:
+            return []
 
-            for doc, meta, dist in zip(docs, metas, dists):
-                memories.append(MemoryItem(text=doc, metadata=meta, distance=dist))
+        docs = results["documents"][0]
+        metas = results["metadatas"][0]
+        distances = results.get("distances")
+        # 距離が返らない場合も0.0のリストは作らず、無限イテレータで埋める
+        dists = distances[0] if distances else itertools.repeat(0.0)
+        # NamedTuple のコンストラクタを map で直接呼ぶ（Pythonループを回さない）
+        return list(map(MemoryItem, docs, metas, dists))
 
-        return memories
+    def retrieve_texts(self, user_id: str, query_text: str, n_results: int = 3) -> List[str]:
+        """関連する記憶のテキストだけを検索する（メタデータ・距離は取得しない）。"""
+        results = self._query(user_id, query_text, n_results, ["documents"])
+        return results["documents"][0] if results["documents"] else []
 
     def clear_memory(self, user_id: str) -> None:
         """特定ユーザーの記憶を全削除する。"""
+        # キューに残った記憶が削除後に書き込まれ、コレクションごと復活しないよう先に書き切る
+        self.flush()
+        with self._collections_lock:
+            self._user_collections.pop(user_id, None)
+        try:
+            self.client.delete_collection(name=self._collection_name(user_id))
+        except Exception:
+            # 未作成のコレクションなどは握りつぶす
+            pass
         try:
             self.collection.delete(where={"user_id": user_id})
         except Exception:
@@ -93,4 +262,5 @@ class MemorySystem:
 
 # Singleton instance
 memory_system = MemorySystem()
+atexit.register(memory_system.flush)
 
@@ -1,7 +1,8 @@
 """ドメインモデル定義（外部依存なし）。"""
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
+import math
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 
@@ -11,7 +12,28 @@ def utc_now() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
 
 
-@dataclass
+PAD_MIN = -10.0
+PAD_MAX = 10.0
+
+
+def _clamp_pad(value: float) -> float:
+    """PAD値を範囲内に収め、0.01単位に丸める（浮動小数の誤差がターンをまたいで蓄積しないように）"""
+    return round(min(PAD_MAX, max(PAD_MIN, value)), 2)
+
+
+def _decay_pad(value: float, factor: float) -> float:
+    """PAD値を factor 倍して0.01単位に丸める
+
+    小さい値は掛けて丸めると元の値に戻り（例: 0.5 * 0.99 -> 0.5）、0 まで減衰しなくなる。
+    その場合は0.01だけ0に近づける。
+    """
+    decayed = round(value * factor, 2)
+    if decayed == value and value != 0.0 and factor < 1.0:
+        decayed = round(value - math.copysign(0.01, value), 2)
+    return decayed
+
+
+@dataclass(slots=True)
 class EmotionState:
     # PAD Model (Pleasure, Arousal, Dominance) -10.0 to +10.0
     pleasure: float = 0.0   # 快 (+10) - 不快 (-10)
@@ -19,14 +41,15 @@ class EmotionState:
     dominance: float = 0.0  # 支配 (+10) - 服従 (-10)
 
     def clamp(self) -> None:
-        self.pleasure = max(-10.0, min(10.0, self.pleasure))
-        self.arousal = max(-10.0, min(10.0, self.arousal))
-        self.dominance = max(-10.0, min(10.0, self.dominance))
+        self.pleasure = _clamp_pad(self.pleasure)
+        self.arousal = _clamp_pad(self.arousal)
+        self.dominance = _clamp_pad(self.dominance)
     
     def decay(self, rate: float = 0.5) -> None:
         """感情の減衰（0に近づく）"""
-        self.pleasure *= (1.0 - rate * 0.1)
-        self.arousal *= (1.0 - rate * 0.1)
+        factor = 1.0 - rate * 0.1
+        self.pleasure = _decay_pad(self.pleasure, factor)
+        self.arousal = _decay_pad(self.arousal, factor)
         # Dominanceは性格依存が強いので減衰させない、あるいは緩やかにする
 
     def to_dict(self) -> Dict[str, float]:
@@ -38,14 +61,23 @@ class EmotionState:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ScenarioState:
     current_phase: str = "phase_1_meeting"
     current_scene: str = "scene_station_front"
     turn_count_in_phase: int = 0
     variables: Dict[str, Any] = field(default_factory=dict)  # フラグや数値変数
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換（variables はコピーして返す）"""
+        return {
+            "current_phase": self.current_phase,
+            "current_scene": self.current_scene,
+            "turn_count_in_phase": self.turn_count_in_phase,
+            "variables": dict(self.variables),
+        }
+
+@dataclass(slots=True)
 class UserState:
     user_id: str
     updated_at: str
@@ -61,7 +93,29 @@ class UserState:
         return cls(user_id=user_id, updated_at=utc_now())
 
     def to_dict(self) -> Dict:
-        return asdict(self)
+        # asdict() の再帰的な deepcopy を避け、フィールドを直接並べる
+        return {
+            "user_id": self.user_id,
+            "updated_at": self.updated_at,
+            "emotion": self.emotion.to_dict(),
+            "scenario": self.scenario.to_dict(),
+            "current_context_memories": list(self.current_context_memories),
+        }
+
+    def clone(self) -> "UserState":
+        """ターン処理用の複製を作る（from_dict(to_dict()) の往復と旧形式の移行処理を通さない）"""
+        return UserState(
+            self.user_id,
+            self.updated_at,
+            EmotionState(self.emotion.pleasure, self.emotion.arousal, self.emotion.dominance),
+            ScenarioState(
+                self.scenario.current_phase,
+                self.scenario.current_scene,
+                self.scenario.turn_count_in_phase,
+                dict(self.scenario.variables),
+            ),
+            list(self.current_context_memories),
+        )
 
     @classmethod
     def from_dict(cls, data: Dict) -> "UserState":
@@ -108,7 +162,7 @@ class UtteranceClassification:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ObservationResult:
     updated_state: UserState
     instruction_override: Optional[str] = None
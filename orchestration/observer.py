@@ -7,7 +7,9 @@ from __future__ import annotations
 
 import json
 import re
+from functools import lru_cache
 from pathlib import Path
+from types import CodeType
 from typing import List, Optional, Dict, Any
 
 from .models import EmotionState, ObservationResult, UserState, UtteranceClassification, utc_now
@@ -17,11 +19,26 @@ from .prompt_loader import load_prompt
 from .agent_logger import agent_logger
 from .utterance_classifier import utterance_classifier, MultiClassificationResult
 
+try:
+    import orjson
+except ImportError:  # 無ければ標準の json で読む
+    orjson = None  # type: ignore
+
 # シナリオデータのロード
 SCENARIO_PATH = Path(__file__).resolve().parent / "data" / "idol_story.json"
 SCENARIO_DATA = {}
 if SCENARIO_PATH.exists():
-    SCENARIO_DATA = json.loads(SCENARIO_PATH.read_text(encoding="utf-8"))
+    if orjson is not None:
+        SCENARIO_DATA = orjson.loads(SCENARIO_PATH.read_bytes())
+    else:
+        SCENARIO_DATA = json.loads(SCENARIO_PATH.read_text(encoding="utf-8"))
+
+# フェーズ定義と各フェーズの初期シーン（ターンごとに引き直さないよう import 時に1度だけ作る）
+_PHASES: Dict[str, Dict[str, Any]] = SCENARIO_DATA.get("phases", {})
+_INITIAL_SCENES: Dict[str, Optional[str]] = {
+    phase_id: next(iter(phase_def.get("scenes") or {}), None)
+    for phase_id, phase_def in _PHASES.items()
+}
 
 DEFAULT_OBSERVER_SYSTEM_PROMPT = (
     "あなたはObserver役です。ユーザー発話と現在の状態を見て、感情パラメータ(PAD)とシナリオ進行を管理してください。\n"
@@ -36,6 +53,26 @@ POSITIVE = ["好き", "楽しい", "嬉しい", "最高", "応援", "可愛い",
 NEGATIVE = ["嫌い", "つまらない", "最低", "うざい", "帰る"]
 ACTIVE = ["行こう", "やる", "走る", "ダンス", "歌", "!"]
 
+# キーワード群ごとに1本の正規表現にまとめ、1回の search で判定する
+_POSITIVE_RE = re.compile("|".join(map(re.escape, POSITIVE)))
+_NEGATIVE_RE = re.compile("|".join(map(re.escape, NEGATIVE)))
+_ACTIVE_RE = re.compile("|".join(map(re.escape, ACTIVE)))
+
+
+def _prompt_json(obj: Any) -> str:
+    """プロンプトに埋め込む値をJSON文字列にする（Python の repr ではなくLLMが読みやすいJSONで渡す）"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    # orjson と同じ空白なしの区切りにして、orjson の有無でプロンプトが変わらないようにする
+    return json.dumps(obj, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+@lru_cache(maxsize=None)
+def _compile_trigger(condition_expr: str) -> CodeType:
+    """trigger_condition を1度だけコンパイルする（毎ターン eval で構文解析し直さない）"""
+    return compile(condition_expr, "<trigger_condition>", "eval")
+
+
 def _check_scenario_trigger(state: UserState, user_message: str = "", history: List[dict] = None) -> tuple[bool, Optional[str]]:
     """
     シナリオ遷移条件をチェックし、満たせば進行させる。
@@ -43,12 +80,10 @@ def _check_scenario_trigger(state: UserState, user_message: str = "", history: L
     Returns:
         tuple[bool, Optional[str]]: (遷移したか, Actorへの提案指示)
     """
-    current_phase_id = state.scenario.current_phase
-    phases = SCENARIO_DATA.get("phases", {})
-    if current_phase_id not in phases:
+    phase_def = _PHASES.get(state.scenario.current_phase)
+    if phase_def is None:
         return (False, None)
 
-    phase_def = phases[current_phase_id]
     next_phase_id = phase_def.get("next_phase")
     condition_expr = phase_def.get("trigger_condition")
     proposal_text = phase_def.get("proposal_text", "")  # 提案テキスト
@@ -95,7 +130,7 @@ def _check_scenario_trigger(state: UserState, user_message: str = "", history: L
 
     # context変数を展開してeval (安全な簡易式のみ想定)
     try:
-        if eval(condition_expr, {"__builtins__": None}, context):
+        if eval(_compile_trigger(condition_expr), {"__builtins__": None}, context):
             # 遷移実行
             state.scenario.current_phase = next_phase_id
             state.scenario.turn_count_in_phase = 0
@@ -105,10 +140,9 @@ def _check_scenario_trigger(state: UserState, user_message: str = "", history: L
             state.scenario.variables["awaiting_consent"] = False
 
             # 新フェーズの初期シーンへ
-            new_phase_def = phases.get(next_phase_id, {})
-            scenes = new_phase_def.get("scenes", {})
-            if scenes:
-                state.scenario.current_scene = next(iter(scenes))
+            initial_scene = _INITIAL_SCENES.get(next_phase_id)
+            if initial_scene:
+                state.scenario.current_scene = initial_scene
 
             return (True, None)
     except Exception as e:
@@ -122,10 +156,10 @@ def _check_scenario_trigger(state: UserState, user_message: str = "", history: L
             context_for_proposal = context.copy()
             context_for_proposal["consent_for_next_phase"] = True
 
-            if eval(condition_expr, {"__builtins__": None}, context_for_proposal):
+            if eval(_compile_trigger(condition_expr), {"__builtins__": None}, context_for_proposal):
                 # ターン条件等は満たしている → 提案を指示
                 state.scenario.variables["awaiting_consent"] = True
-                next_phase_def = phases.get(next_phase_id, {})
+                next_phase_def = _PHASES.get(next_phase_id, {})
                 proposal_instruction = proposal_text or f"次のフェーズ「{next_phase_def.get('description', next_phase_id)}」への移行を提案してください。"
                 return (False, proposal_instruction)
         except Exception as e:
@@ -134,14 +168,13 @@ def _check_scenario_trigger(state: UserState, user_message: str = "", history: L
     return (False, None)
 
 def _apply_keywords(text: str, emo: EmotionState) -> None:
-    lowered = text
-    if any(k in lowered for k in POSITIVE):
+    if _POSITIVE_RE.search(text):
         emo.pleasure += 1.0
         emo.arousal += 0.5
-    if any(k in lowered for k in NEGATIVE):
+    if _NEGATIVE_RE.search(text):
         emo.pleasure -= 1.5
         emo.dominance -= 0.5
-    if any(k in lowered for k in ACTIVE):
+    if _ACTIVE_RE.search(text):
         emo.arousal += 1.0
 
 def _convert_classification(cls_result: MultiClassificationResult) -> tuple:
@@ -215,7 +248,7 @@ def update_state(user_message: str, state: UserState, history: List[dict]) -> Ob
 
     if result is None:
         # Fallback: Rule-based update
-        new_state = UserState.from_dict(state.to_dict())
+        new_state = state.clone()
         _apply_keywords(user_message, new_state.emotion)
         new_state.emotion.clamp()
         new_state.emotion.decay(0.1)
@@ -267,7 +300,7 @@ def _update_state_llm(
     
     # 現在のフェーズ情報を注入
     phase_id = state.scenario.current_phase
-    phase_info = SCENARIO_DATA.get("phases", {}).get(phase_id, {})
+    phase_info = _PHASES.get(phase_id, {})
     
     schema = {
         "type": "object",
@@ -297,9 +330,9 @@ def _update_state_llm(
         {
             "role": "user",
             "content": (
-                f"現在の状態: {state.to_dict()}\n"
-                f"現在のフェーズ情報: {phase_info}\n"
-                f"直近履歴: {history}\n"
+                f"現在の状態: {_prompt_json(state.to_dict())}\n"
+                f"現在のフェーズ情報: {_prompt_json(phase_info)}\n"
+                f"直近履歴: {_prompt_json(history)}\n"
                 f"ユーザー発話: {user_message}"
             ),
         },
@@ -312,7 +345,7 @@ def _update_state_llm(
         agent_type="observer",
     )
 
-    new_state = UserState.from_dict(state.to_dict())
+    new_state = state.clone()
     
     # Emotion Update
     emo = data.get("emotion", {})
@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict
 
 from .actor import generate_reply
@@ -23,9 +25,16 @@ if not IS_VERCEL:
 USE_LANGGRAPH = os.getenv("USE_LANGGRAPH", "false").lower() == "true"
 
 
+_storage_ready = False
+
+
 def ensure_storage_ready() -> None:
     """DB 初期化を一度だけ実行。"""
+    global _storage_ready
+    if _storage_ready:
+        return
     init_db()
+    _storage_ready = True
 
 
 def process_chat_turn(user_id: str, user_message: str) -> Dict:
@@ -49,15 +58,27 @@ def _process_chat_turn_langgraph(user_id: str, user_message: str) -> Dict:
     return run_dialogue_graph(user_id, user_message)
 
 
-# ユーザーごとのメモリインスタンスを保持
-_memory_instances: Dict[str, HierarchicalMemory] = {}
+# ユーザーごとのメモリインスタンスを保持（LRUで件数に上限を設ける）
+MAX_MEMORY_INSTANCES = 10_000
+_memory_instances: "OrderedDict[str, HierarchicalMemory]" = OrderedDict()
+# 同じユーザーの同時リクエストが別々のインスタンス（＝別の短期記憶セッション）を作らないよう、
+# 取得・作成・破棄はまとめてロックする
+_memory_lock = threading.Lock()
 
 
 def get_memory(user_id: str) -> HierarchicalMemory:
     """ユーザーのメモリインスタンスを取得（なければ作成）"""
-    if user_id not in _memory_instances:
-        _memory_instances[user_id] = HierarchicalMemory(user_id)
-    return _memory_instances[user_id]
+    with _memory_lock:
+        memory = _memory_instances.get(user_id)
+        if memory is None:
+            memory = HierarchicalMemory(user_id)
+            _memory_instances[user_id] = memory
+            while len(_memory_instances) > MAX_MEMORY_INSTANCES:
+                _memory_instances.popitem(last=False)
+        else:
+            # 最近使ったものとして末尾に移す
+            _memory_instances.move_to_end(user_id)
+        return memory
 
 
 def _process_chat_turn_legacy(user_id: str, user_message: str) -> Dict:
@@ -74,7 +95,7 @@ def _process_chat_turn_legacy(user_id: str, user_message: str) -> Dict:
 
     # ベクトル記憶にも入力を保存（モックしやすい副作用）
     if vector_store and hasattr(vector_store, 'memory_system') and vector_store.memory_system:
-        vector_store.memory_system.save_memory(user_id, user_message, role="user", phase="interaction")
+        vector_store.memory_system.enqueue_save(user_id, user_message, role="user", phase="interaction")
 
     # 1. Observer: ステート更新 (感情, シナリオ変遷)
     observation = observe(user_message, state, history)
@@ -133,7 +154,7 @@ def _process_chat_turn_legacy(user_id: str, user_message: str) -> Dict:
 
     # ベクトル記憶にアシスタント返答も保存
     if vector_store and hasattr(vector_store, 'memory_system') and vector_store.memory_system:
-        vector_store.memory_system.save_memory(user_id, final_reply, role="assistant", phase="interaction")
+        vector_store.memory_system.enqueue_save(user_id, final_reply, role="assistant", phase="interaction")
 
     return {"reply": final_reply, "state": new_state}
 
@@ -147,8 +168,8 @@ def reset_session(user_id: str) -> None:
     memory.clear_all()
 
     # メモリインスタンスを削除
-    if user_id in _memory_instances:
-        del _memory_instances[user_id]
+    with _memory_lock:
+        _memory_instances.pop(user_id, None)
 
     # DB（状態）をリセット
     reset_user(user_id)
@@ -14,7 +14,7 @@ def load_prompt(name: str, default: str) -> str:
     """
     path = PROMPT_DIR / f"{name}.txt"
     try:
-        text = path.read_text(encoding="utf-8")
+        text = path.read_bytes().decode("utf-8")
         if text.strip():
             return text
     except FileNotFoundError:
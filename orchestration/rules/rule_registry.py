@@ -30,6 +30,8 @@ class RuleRegistry:
         self._character_core: Optional[CharacterCore] = None
         self._custom_checkers: Dict[str, Callable] = {}
         self._raw_data: Dict[str, Any] = {}
+        # ルールを読み込むたびに増える（派生キャッシュの無効化判定用）
+        self._version = 0
         self._load_rules()
 
     @classmethod
@@ -47,8 +49,14 @@ class RuleRegistry:
         """インスタンスをリセット（テスト用）"""
         cls._instance = None
 
+    @property
+    def version(self) -> int:
+        """ルールの読み込み世代（reload のたびに変わる）"""
+        return self._version
+
     def _load_rules(self) -> None:
         """JSONからルールをロード"""
+        self._version += 1
         if not self._rules_path.exists():
             print(f"[RuleRegistry] Warning: Rules file not found at {self._rules_path}")
             return
@@ -1,7 +1,8 @@
 """ルールセレクター - 当該ターンに適用されるルールを抽出・要約"""
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional, TYPE_CHECKING
+from functools import cached_property
+from typing import Dict, List, Any, Optional, Tuple, TYPE_CHECKING
 
 from .rule_registry import RuleRegistry
 from .rule_types import HardRule, SoftRule, StateDependentRule
@@ -19,12 +20,61 @@ class SelectedRules:
     allow_nsfw: bool
     summary: str  # LLMに渡す要約テキスト
 
+    @cached_property
+    def rendered_hints(self) -> str:
+        """Actor への指示に付ける状態依存ルールのヒント（先頭3件、箇条書き）"""
+        hints = [
+            r.prompt_hint or r.description
+            for r in self.state_dependent_rules
+            if r.prompt_hint or r.description
+        ]
+        return "\n".join(f"- {h}" for h in hints[:3])
+
+    @property
+    def has_constraints(self) -> bool:
+        """検証対象になるルールが1つでもあるか"""
+        return bool(self.hard_rules or self.soft_rules or self.state_dependent_rules)
+
+
+@dataclass(frozen=True)
+class _StaticRules:
+    """状態・発話に依存しないルール選択結果"""
+    version: int
+    hard_rules: List[HardRule]
+    soft_rules: List[Tuple[SoftRule, bool]]  # (ルール, 条件付きか)
+    hard_summary: str
+
 
 class RuleSelector:
     """当該ターンに適用されるルールを抽出し、要約を生成"""
 
     def __init__(self, registry: Optional[RuleRegistry] = None):
         self._registry = registry or RuleRegistry.get_instance()
+        # 状態に依存しない部分のキャッシュ（registry.version ごとに作り直す）
+        self._static_cache: Optional[_StaticRules] = None
+
+    def _static_rules(self) -> "_StaticRules":
+        """HardRule・無条件 SoftRule・必須ルール要約を返す（ルール読み込みごとに1回だけ作る）"""
+        cached = self._static_cache
+        version = self._registry.version
+        if cached is None or cached.version != version:
+            hard_rules = self._registry.get_hard_rules()
+            soft_rules = self._registry.get_soft_rules()
+
+            hard_lines = ["\n### 必須ルール（違反不可）"]
+            for rule in hard_rules[:5]:  # 上位5件のみ表示
+                hard_lines.append(f"- {rule.description}")
+            if len(hard_rules) > 5:
+                hard_lines.append(f"- ...他 {len(hard_rules) - 5} 件")
+
+            cached = _StaticRules(
+                version=version,
+                hard_rules=hard_rules,
+                soft_rules=[(rule, bool(rule.condition)) for rule in soft_rules],
+                hard_summary="\n".join(hard_lines),
+            )
+            self._static_cache = cached
+        return cached
 
     def select_rules(
         self,
@@ -34,17 +84,16 @@ class RuleSelector:
     ) -> SelectedRules:
         """現在の状態に基づいて適用ルールを選択"""
 
+        static = self._static_rules()
+
         # HardRulesは常に全て適用
-        hard_rules = self._registry.get_hard_rules()
+        hard_rules = static.hard_rules
 
         # SoftRulesは条件があれば評価
-        soft_rules = []
-        for rule in self._registry.get_soft_rules():
-            if rule.condition:
-                if self._evaluate_condition(rule.condition, state, user_message):
-                    soft_rules.append(rule)
-            else:
-                soft_rules.append(rule)
+        soft_rules = [
+            rule for rule, conditional in static.soft_rules
+            if not conditional or self._evaluate_condition(rule.condition, state, user_message)
+        ]
 
         # StateDependentRulesは条件評価
         applicable_sdr = []
@@ -57,7 +106,10 @@ class RuleSelector:
                     allow_nsfw = True
 
         # 要約生成
-        summary = self._generate_summary(hard_rules, soft_rules, applicable_sdr, allow_nsfw, state)
+        summary = self._generate_summary(
+            hard_rules, soft_rules, applicable_sdr, allow_nsfw, state,
+            hard_summary=static.hard_summary,
+        )
 
         return SelectedRules(
             hard_rules=hard_rules,
@@ -171,6 +223,7 @@ class RuleSelector:
         state_dependent: List[StateDependentRule],
         allow_nsfw: bool,
         state: "UserState",
+        hard_summary: Optional[str] = None,
     ) -> str:
         """ルール要約をテキストで生成（LLMプロンプト用）"""
         lines = ["## 適用ルール要約"]
@@ -182,12 +235,15 @@ class RuleSelector:
         lines.append(f"- ターン: {state.scenario.turn_count_in_phase}")
         lines.append(f"- 感情(PAD): P={state.emotion.pleasure:.1f}, A={state.emotion.arousal:.1f}, D={state.emotion.dominance:.1f}")
 
-        # 必須ルール
-        lines.append("\n### 必須ルール（違反不可）")
-        for rule in hard_rules[:5]:  # 上位5件のみ表示
-            lines.append(f"- {rule.description}")
-        if len(hard_rules) > 5:
-            lines.append(f"- ...他 {len(hard_rules) - 5} 件")
+        # 必須ルール（状態に依存しないので select_rules からは整形済みのものを受け取る）
+        if hard_summary is not None:
+            lines.append(hard_summary)
+        else:
+            lines.append("\n### 必須ルール（違反不可）")
+            for rule in hard_rules[:5]:  # 上位5件のみ表示
+                lines.append(f"- {rule.description}")
+            if len(hard_rules) > 5:
+                lines.append(f"- ...他 {len(hard_rules) - 5} 件")
 
         # 推奨ルール
         if soft_rules:
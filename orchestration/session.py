@@ -5,16 +5,37 @@
 """
 from __future__ import annotations
 
-from typing import Dict, List
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import threading
+import time
+
+
+MAX_SESSIONS = 10_000  # 保持するセッション数の上限（超えたら古いものから破棄）
+MAX_HISTORY = 50  # 1セッションで保持する履歴の上限（古いものから破棄）
+DUPLICATE_WINDOW_SEC = 2.0  # 同一発話を二重送信とみなす間隔
+DUPLICATE_WAIT_SEC = 60.0  # 二重送信時に先行リクエストの完了を待つ上限
+
+
+@dataclass(slots=True)
+class MessageClaim:
+    """claim_message で得た発話1件分の処理権（完了通知と処理結果の入れ物）"""
+    message: str
+    claimed_at: float
+    result: Optional[Dict[str, Any]] = None
+    done: threading.Event = field(default_factory=threading.Event)
 
 
 @dataclass
 class Session:
     """1ユーザーのセッション"""
     user_id: str
-    history: List[Dict[str, str]] = field(default_factory=list)
+    history: Deque[Dict[str, str]] = field(default_factory=lambda: deque(maxlen=MAX_HISTORY))
+    # 二重送信検出用（直前のユーザー発話の処理権）
+    _last_claim: Optional[MessageClaim] = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
     def add_message(self, role: str, content: str):
         """履歴にメッセージを追加"""
@@ -22,11 +43,44 @@ class Session:
 
     def get_history(self, limit: int = 20) -> List[Dict[str, str]]:
         """直近の履歴を取得"""
-        return self.history[-limit:]
+        start = max(len(self.history) - limit, 0)
+        return list(islice(self.history, start, None))
 
     def clear(self):
         """履歴をクリア"""
         self.history.clear()
+        with self._lock:
+            self._last_claim = None
+
+    def claim_message(self, message: str) -> Tuple[MessageClaim, bool]:
+        """発話の処理権を得る。
+
+        直前と同じ発話が DUPLICATE_WINDOW_SEC 以内に届いた場合は二重送信とみなし、
+        先行リクエストの処理権を (claim, True) で返す。新しい発話なら新しい処理権を
+        (claim, False) で返す。結果の記録・待機は返された claim に対してのみ行うので、
+        後続の発話が処理権を取り直しても先行リクエストの結果は混ざらない。
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_claim
+            if last is not None and message == last.message and now - last.claimed_at < DUPLICATE_WINDOW_SEC:
+                return last, True
+            claim = MessageClaim(message=message, claimed_at=now)
+            self._last_claim = claim
+            return claim, False
+
+    @staticmethod
+    def finish_message(claim: MessageClaim, result: Optional[Dict[str, Any]]):
+        """claim_message で得た発話の処理結果を記録する（失敗時は None）"""
+        claim.result = result
+        claim.done.set()
+
+    @staticmethod
+    def wait_duplicate(claim: MessageClaim) -> Optional[Dict[str, Any]]:
+        """先行リクエストの結果を待って返す（失敗・タイムアウト時は None）"""
+        if not claim.done.wait(DUPLICATE_WAIT_SEC):
+            return None
+        return claim.result
 
 
 class SessionManager:
@@ -47,13 +101,20 @@ class SessionManager:
         if self._initialized:
             return
         self._initialized = True
-        self._sessions: Dict[str, Session] = {}
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
 
     def get_session(self, user_id: str) -> Session:
         """セッションを取得（なければ作成）"""
-        if user_id not in self._sessions:
-            self._sessions[user_id] = Session(user_id=user_id)
-        return self._sessions[user_id]
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None:
+                session = Session(user_id=user_id)
+                self._sessions[user_id] = session
+                if len(self._sessions) > MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(user_id)
+            return session
 
     def clear_session(self, user_id: str):
         """セッションをクリア"""
@@ -5,7 +5,7 @@ import json
 import os
 import sqlite3
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .models import UserState, utc_now
 
@@ -49,16 +49,20 @@ def init_db() -> None:
         conn.commit()
 
 
+def _select_state(conn: sqlite3.Connection, user_id: str) -> Optional[UserState]:
+    cur = conn.execute(
+        "SELECT state_json FROM user_states WHERE user_id = ?", (user_id,)
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    data = json.loads(row["state_json"])
+    return UserState.from_dict(data)
+
+
 def fetch_state(user_id: str) -> Optional[UserState]:
     with _connect() as conn:
-        cur = conn.execute(
-            "SELECT state_json FROM user_states WHERE user_id = ?", (user_id,)
-        )
-        row = cur.fetchone()
-        if not row:
-            return None
-        data = json.loads(row["state_json"])
-        return UserState.from_dict(data)
+        return _select_state(conn, user_id)
 
 
 def update_state(user_id: str, state: UserState) -> None:
@@ -78,22 +82,31 @@ def update_state(user_id: str, state: UserState) -> None:
         conn.commit()
 
 
+def _select_history(conn: sqlite3.Connection, user_id: str, limit: int) -> List[Dict]:
+    cur = conn.execute(
+        """
+        SELECT role, content, created_at
+          FROM chat_logs
+         WHERE user_id = ?
+         ORDER BY id DESC
+         LIMIT ?
+        """,
+        (user_id, limit),
+    )
+    rows = cur.fetchall()
+    # 逆順で返す（古い順）
+    return [{"role": r["role"], "content": r["content"], "created_at": r["created_at"]} for r in reversed(rows)]
+
+
 def fetch_history(user_id: str, limit: int = 10) -> List[Dict]:
     with _connect() as conn:
-        cur = conn.execute(
-            """
-            SELECT role, content, created_at
-              FROM chat_logs
-             WHERE user_id = ?
-             ORDER BY id DESC
-             LIMIT ?
-            """,
-            (user_id, limit),
-        )
-        rows = cur.fetchall()
-    # 逆順で返す（古い順）
-    history = [{"role": r["role"], "content": r["content"], "created_at": r["created_at"]} for r in reversed(rows)]
-    return history
+        return _select_history(conn, user_id, limit)
+
+
+def fetch_state_and_history(user_id: str, limit: int = 10) -> Tuple[Optional[UserState], List[Dict]]:
+    """状態と直近の履歴を1つの接続でまとめて取得する。"""
+    with _connect() as conn:
+        return _select_state(conn, user_id), _select_history(conn, user_id, limit)
 
 
 def append_log(user_id: str, role: str, content: str) -> None:
@@ -112,9 +125,3 @@ def reset_user(user_id: str) -> None:
         conn.execute("DELETE FROM user_states WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM chat_logs WHERE user_id = ?", (user_id,))
         conn.commit()
-def reset_user(user_id: str) -> None:
-    """ユーザーの状態とログを完全に削除する。"""
-    with _connect() as conn:
-        conn.execute("DELETE FROM user_states WHERE user_id = ?", (user_id,))
-        conn.execute("DELETE FROM chat_logs WHERE user_id = ?", (user_id,))
-        conn.commit()
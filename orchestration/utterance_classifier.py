@@ -95,6 +95,30 @@ CHIT_CHAT_PATTERNS = [
 ]
 
 
+# 同意判定用のキーワード
+CONSENT_POSITIVE = (
+    "いいよ", "行こう", "そうしよう", "うん", "はい", "いいね", "行きたい",
+    "賛成", "OK", "ok", "オッケー", "いいですよ", "そうだね", "いこう",
+    "わかった", "了解", "いいわよ", "そうね", "お願い", "ぜひ", "もちろん",
+    "そうする", "いい", "ええ", "あー、いい", "まあいい"
+)
+CONSENT_NEGATIVE = (
+    "やめ", "いや", "嫌", "無理", "帰る", "帰り", "まだ", "ちょっと待",
+    "待って", "違う", "ダメ", "だめ", "やだ", "遠慮", "結構", "いらない",
+    "パス", "今度", "また今度", "後で"
+)
+
+
+def _compile_keywords(keywords) -> re.Pattern:
+    """キーワード群を1本の正規表現にまとめる（長いものを優先してマッチ）"""
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, ordered)))
+
+
+_CONSENT_POSITIVE_RE = _compile_keywords(CONSENT_POSITIVE)
+_CONSENT_NEGATIVE_RE = _compile_keywords(CONSENT_NEGATIVE)
+
+
 class UtteranceClassifier:
     """
     ユーザー発話分類器
@@ -409,29 +433,17 @@ class UtteranceClassifier:
 
     def _check_consent_with_rules(self, utterance: str) -> tuple[bool, float, str]:
         """ルールベースの同意判定（フォールバック）"""
-        CONSENT_POSITIVE = [
-            "いいよ", "行こう", "そうしよう", "うん", "はい", "いいね", "行きたい",
-            "賛成", "OK", "ok", "オッケー", "いいですよ", "そうだね", "いこう",
-            "わかった", "了解", "いいわよ", "そうね", "お願い", "ぜひ", "もちろん",
-            "そうする", "いい", "ええ", "あー、いい", "まあいい"
-        ]
-        CONSENT_NEGATIVE = [
-            "やめ", "いや", "嫌", "無理", "帰る", "帰り", "まだ", "ちょっと待",
-            "待って", "違う", "ダメ", "だめ", "やだ", "遠慮", "結構", "いらない",
-            "パス", "今度", "また今度", "後で"
-        ]
-
         lowered = utterance.lower()
 
         # 否定キーワードチェック（優先）
-        for neg in CONSENT_NEGATIVE:
-            if neg in lowered:
-                return (False, 0.7, f"拒否キーワード検出: {neg}")
+        match = _CONSENT_NEGATIVE_RE.search(lowered)
+        if match:
+            return (False, 0.7, f"拒否キーワード検出: {match.group()}")
 
         # 肯定キーワードチェック
-        for pos in CONSENT_POSITIVE:
-            if pos in lowered:
-                return (True, 0.7, f"同意キーワード検出: {pos}")
+        match = _CONSENT_POSITIVE_RE.search(lowered)
+        if match:
+            return (True, 0.7, f"同意キーワード検出: {match.group()}")
 
         # どちらでもない場合はデフォルトで非同意
         return (False, 0.4, "明確な同意表現なし")
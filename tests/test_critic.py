@@ -9,6 +9,13 @@ def test_critic_success(mock_llm_client, mock_settings):
     assert is_ok is True
     assert feedback == ""
 
+def test_critic_parses_fenced_json(mock_llm_client, mock_settings):
+    mock_llm_client.chat.return_value = '```json\n{"is_ok": false, "feedback": "口調が違う"}\n```'
+
+    is_ok, feedback = critic.check_reply("User input", "Draft reply")
+    assert is_ok is False
+    assert feedback == "口調が違う"
+
 def test_critic_failure_fallback(mock_llm_client, mock_settings):
     mock_llm_client.chat.side_effect = RuntimeError("API Error")
     
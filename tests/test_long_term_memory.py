@@ -0,0 +1,196 @@
+"""長期記憶の一括保存のテスト"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from orchestration.memory.long_term import EMBEDDING_MODEL
+
+
+@pytest.fixture
+def mock_supabase():
+    """Supabaseクライアントのモック"""
+    with patch("orchestration.memory.long_term.get_supabase") as mock:
+        client = MagicMock()
+        mock.return_value = client
+        yield client
+
+
+@pytest.fixture
+def llm():
+    """Embedding用LLMクライアントのモック"""
+    client = MagicMock()
+    with patch("orchestration.memory.long_term._llm", return_value=client):
+        yield client
+
+
+@pytest.fixture
+def manager(mock_supabase, llm):
+    from orchestration.memory._embed_cache import embedding_cache
+    from orchestration.memory.long_term import LongTermMemoryManager
+    embedding_cache.clear()
+    return LongTermMemoryManager(user_id="u1")
+
+
+def test_save_many_embeds_and_inserts_once(manager, mock_supabase, llm):
+    """複数件でもEmbeddingとINSERTは1回ずつ"""
+    llm.embed_batch.return_value = [[0.1], [0.2]]
+    mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(
+        data=[{"id": "a"}, {"id": "b"}]
+    )
+
+    ids = manager.save_many([
+        {"content": "猫が好き", "memory_type": "preference", "importance": 0.8},
+        {"content": "東京在住", "memory_type": "unknown", "importance": 1.5},
+    ])
+
+    assert ids == ["a", "b"]
+    llm.embed_batch.assert_called_once_with(["猫が好き", "東京在住"], model=EMBEDDING_MODEL)
+    rows = mock_supabase.table.return_value.insert.call_args.args[0]
+    assert [r["embedding"] for r in rows] == ["[0.1]", "[0.2]"]
+    assert rows[1]["memory_type"] == "fact"
+    assert rows[1]["importance"] == 1.0
+
+
+def test_save_keeps_row_when_embedding_fails(manager, mock_supabase, llm):
+    """Embeddingに失敗してもベクトルなしで保存する"""
+    llm.embed_batch.side_effect = RuntimeError("API Error")
+    mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(
+        data=[{"id": "a"}]
+    )
+
+    assert manager.save("猫が好き", "preference") == "a"
+    rows = mock_supabase.table.return_value.insert.call_args.args[0]
+    assert rows[0]["embedding"] is None
+
+
+def test_low_importance_is_saved_without_embedding(manager, mock_supabase, llm):
+    """重要度が閾値未満の記憶はベクトル化しない"""
+    llm.embed_batch.side_effect = lambda texts, model: [[0.5] for _ in texts]
+
+    manager.save_many([
+        {"content": "雑談", "memory_type": "event", "importance": 0.2},
+        {"content": "猫が好き", "memory_type": "preference", "importance": 0.8},
+    ])
+
+    llm.embed_batch.assert_called_once_with(["猫が好き"], model=EMBEDDING_MODEL)
+    rows = mock_supabase.table.return_value.insert.call_args.args[0]
+    assert [r["embedding"] for r in rows] == [None, "[0.5]"]
+
+
+def test_embedding_cache_skips_known_texts(manager, mock_supabase, llm):
+    """一度ベクトル化したテキストは再度APIに投げない"""
+    llm.embed_batch.side_effect = lambda texts, model: [[float(len(t))] for t in texts]
+    mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[])
+
+    manager.save_many([{"content": "猫"}, {"content": "犬です"}])
+    manager.save_many([{"content": "犬です"}, {"content": "鳥"}])
+
+    calls = [c.args[0] for c in llm.embed_batch.call_args_list]
+    assert calls == [["猫", "犬です"], ["鳥"]]
+    rows = mock_supabase.table.return_value.insert.call_args.args[0]
+    assert [r["embedding"] for r in rows] == ["[3.0]", "[1.0]"]
+
+
+def test_embedding_cache_key_includes_model():
+    """モデルが違えば同じテキストでもキャッシュを使わない"""
+    from orchestration.memory._embed_cache import EmbeddingCache
+    cache = EmbeddingCache()
+    embed_batch = MagicMock(side_effect=lambda texts, model: [[float(len(model))] for _ in texts])
+
+    assert cache.embed("猫", embed_batch, "small") == [5.0]
+    assert cache.embed("猫", embed_batch, "small") == [5.0]
+    assert cache.embed("猫", embed_batch, "large-model") == [11.0]
+    assert embed_batch.call_count == 2
+
+
+def test_search_touches_results_in_one_update(manager, mock_supabase, llm):
+    """検索結果のアクセス時刻は1回のUPDATEで更新する"""
+    llm.embed_batch.return_value = [[0.1]]
+    mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=[
+        {"id": "a", "user_id": "u1", "content": "猫が好き", "memory_type": "preference",
+         "importance": 0.8, "created_at": "", "last_accessed_at": ""},
+        {"id": "b", "user_id": "u1", "content": "東京在住", "memory_type": "fact",
+         "importance": 0.5, "created_at": "", "last_accessed_at": ""},
+    ])
+
+    results = manager.search("好きなもの")
+
+    assert [r.id for r in results] == ["a", "b"]
+    update = mock_supabase.table.return_value.update
+    update.assert_called_once()
+    update.return_value.in_.assert_called_once_with("id", ["a", "b"])
+
+
+def test_decay_old_memories_uses_single_rpc(manager, mock_supabase):
+    """減衰は行ごとのUPDATE/DELETEではなく1回のRPCで行う"""
+    mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=3)
+
+    assert manager.decay_old_memories() == 3
+
+    mock_supabase.client.rpc.assert_called_once()
+    name, params = mock_supabase.client.rpc.call_args.args
+    assert name == "decay_long_term_memory"
+    assert params["match_user_id"] == "u1"
+    assert params["decay_days"] == 30
+    mock_supabase.table.return_value.delete.assert_not_called()
+    mock_supabase.table.return_value.update.assert_not_called()
+
+
+def test_get_all_does_not_select_embedding(manager, mock_supabase):
+    """一覧取得では embedding 列を読み出さない"""
+    manager.get_all(limit=10)
+
+    columns = mock_supabase.table.return_value.select.call_args.args[0]
+    assert "embedding" not in columns
+    assert "content" in columns
+
+
+def test_update_importance_clamps_in_sql(manager, mock_supabase):
+    """重要度の丸めはRPC側に任せ、値はそのまま渡す"""
+    assert manager.update_importance("m1", 1.5) is True
+
+    name, params = mock_supabase.client.rpc.call_args.args
+    assert name == "set_long_term_memory_importance"
+    assert params == {"match_user_id": "u1", "memory_id": "m1", "new_importance": 1.5}
+
+
+def _missing_embedding_chain(client):
+    return client.table.return_value.select.return_value.eq.return_value.eq.return_value \
+        .is_.return_value.maybe_single.return_value.execute
+
+
+def test_update_importance_embeds_when_crossing_threshold(manager, mock_supabase, llm):
+    """ベクトルなしで保存された記憶も、重要度が閾値を超えたらベクトル化する"""
+    llm.embed_batch.return_value = [[0.25]]
+    _missing_embedding_chain(mock_supabase).return_value = MagicMock(data={"content": "猫が好き"})
+
+    assert manager.update_importance("m1", 0.9) is True
+
+    llm.embed_batch.assert_called_once_with(["猫が好き"], model=EMBEDDING_MODEL)
+    mock_supabase.table.return_value.update.assert_called_once_with({"embedding": "[0.25]"})
+
+
+def test_update_importance_below_threshold_skips_embedding(manager, mock_supabase, llm):
+    """閾値未満への更新ではベクトル化しない"""
+    assert manager.update_importance("m1", 0.2) is True
+
+    _missing_embedding_chain(mock_supabase).assert_not_called()
+    llm.embed_batch.assert_not_called()
+
+
+def test_update_importance_skips_already_embedded(manager, mock_supabase, llm):
+    """既にベクトルを持つ記憶は再ベクトル化しない"""
+    _missing_embedding_chain(mock_supabase).return_value = None
+
+    assert manager.update_importance("m1", 0.9) is True
+
+    llm.embed_batch.assert_not_called()
+    mock_supabase.table.return_value.update.assert_not_called()
+
+
+def test_count_uses_head_request(manager, mock_supabase):
+    """件数は count="exact", head=True で取得し、行は読み出さない"""
+    mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value = \
+        MagicMock(count=120)
+
+    assert manager.count() == 120
+    mock_supabase.table.return_value.select.assert_called_once_with("id", count="exact", head=True)
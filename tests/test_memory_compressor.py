@@ -89,38 +89,32 @@ class TestDecayMemories:
 
     def test_decay_old_memories(self, compressor, mock_supabase):
         """古い記憶の重要度が減衰する"""
-        old_date = (datetime.utcnow() - timedelta(days=35)).isoformat()
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[
-                {"id": "1", "importance": 0.5},
-                {"id": "2", "importance": 0.3},
-            ]
-        )
-        mock_supabase.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock()
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=2)
 
         count = compressor.decay_memories()
 
         assert count == 2
 
-    def test_decay_deletes_low_importance(self, compressor, mock_supabase):
-        """重要度が閾値以下になったら削除"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[
-                {"id": "1", "importance": 0.05},  # 閾値以下
-            ]
-        )
-        mock_supabase.table.return_value.delete.return_value.eq.return_value.execute.return_value = MagicMock()
+    def test_decay_uses_single_rpc(self, compressor, mock_supabase):
+        """減衰・削除は1回のRPCで行い、行ごとの更新をしない"""
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=1)
 
         compressor.decay_memories()
 
-        # deleteが呼ばれる
-        mock_supabase.table.return_value.delete.assert_called()
+        mock_supabase.client.rpc.assert_called_once()
+        name, params = mock_supabase.client.rpc.call_args.args
+        assert name == "decay_long_term_memory"
+        assert params["match_user_id"] == "test_user_123"
+        assert params["decay_amount"] == 0.1
+        assert params["min_importance"] == 0.1
+        assert params["decay_days"] == 30
+        assert "threshold_date" not in params
+        mock_supabase.table.return_value.update.assert_not_called()
+        mock_supabase.table.return_value.delete.assert_not_called()
 
     def test_no_old_memories(self, compressor, mock_supabase):
         """古い記憶がない場合は0"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[]
-        )
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=0)
 
         count = compressor.decay_memories()
 
@@ -132,37 +126,26 @@ class TestArchive:
 
     def test_archive_low_importance(self, compressor, mock_supabase):
         """低重要度記憶がアーカイブされる"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[
-                {"id": "1", "user_id": "test_user_123", "content": "古い記憶", "importance": 0.08},
-            ]
-        )
-        mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[{}])
-        mock_supabase.table.return_value.delete.return_value.eq.return_value.execute.return_value = MagicMock()
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=1)
 
         count = compressor.archive_low_importance(threshold=0.1)
 
         assert count == 1
 
     def test_archive_moves_to_archive_table(self, compressor, mock_supabase):
-        """アーカイブテーブルに移動される"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[{"id": "1", "user_id": "test_user_123", "content": "古い記憶", "importance": 0.05}]
-        )
-        mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[{}])
-        mock_supabase.table.return_value.delete.return_value.eq.return_value.execute.return_value = MagicMock()
+        """アーカイブテーブルへの移動は1回のRPCで行う"""
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=1)
 
-        compressor.archive_low_importance()
+        compressor.archive_low_importance(threshold=0.2)
 
-        # archived_memoriesにinsert
-        insert_calls = mock_supabase.table.return_value.insert.call_args_list
-        assert len(insert_calls) > 0
+        mock_supabase.client.rpc.assert_called_once_with(
+            "archive_long_term_memory",
+            {"match_user_id": "test_user_123", "threshold": 0.2},
+        )
 
     def test_no_low_importance_memories(self, compressor, mock_supabase):
         """低重要度記憶がない場合は0"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[]
-        )
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=0)
 
         count = compressor.archive_low_importance()
 
@@ -176,7 +159,7 @@ class TestRunMaintenance:
         """メンテナンス結果の統計が返る"""
         # モック設定
         mock_supabase.table.return_value.select.return_value.eq.return_value.gte.return_value.order.return_value.execute.return_value = MagicMock(data=[])
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(data=[])
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=0)
 
         result = compressor.run_maintenance()
 
@@ -189,17 +172,16 @@ class TestRunMaintenance:
         mock_supabase.table.return_value.select.return_value.eq.return_value.gte.return_value.order.return_value.execute.return_value = MagicMock(
             data=[{"id": "1", "summary": "テスト", "importance": 0.5, "created_at": datetime.utcnow().isoformat()}]
         )
-        mock_supabase.table.return_value.select.return_value.eq.return_value.lt.return_value.execute.return_value = MagicMock(
-            data=[{"id": "2", "importance": 0.5}]
-        )
         mock_supabase.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[{}])
-        mock_supabase.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock()
+        mock_supabase.client.rpc.return_value.execute.return_value = MagicMock(data=1)
 
         result = compressor.run_maintenance()
 
         # 各処理が実行された
-        assert result["decayed_count"] >= 0
-        assert result["archived_count"] >= 0
+        assert result["decayed_count"] == 1
+        assert result["archived_count"] == 1
+        rpc_names = [c.args[0] for c in mock_supabase.client.rpc.call_args_list]
+        assert rpc_names == ["decay_long_term_memory", "archive_long_term_memory"]
 
 
 class TestEdgeCases:
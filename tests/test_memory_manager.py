@@ -0,0 +1,34 @@
+"""階層メモリの昇格処理のテスト"""
+from unittest.mock import patch
+
+
+def test_promotion_saves_candidates_in_one_batch():
+    """長期記憶候補は save_many にまとめて渡される（Embeddingは1回）"""
+    with patch("orchestration.memory.memory_manager.get_supabase"), \
+            patch("orchestration.memory.memory_manager.ShortTermMemory"), \
+            patch("orchestration.memory.memory_manager.MidTermMemoryManager"), \
+            patch("orchestration.memory.memory_manager.LongTermMemoryManager"):
+        from orchestration.memory.memory_manager import HierarchicalMemory
+
+        memory = HierarchicalMemory(user_id="u1")
+        memory.short_term.get_all_for_summarization.return_value = [
+            {"role": "user", "content": "猫が好き"},
+        ]
+        memory.short_term.turn_range = (1, 15)
+        memory.mid_term.create_from_short_term.return_value = {
+            "mid_term_id": "m1",
+            "summary": "要約",
+            "long_term_candidates": [
+                {"content": "猫が好き", "memory_type": "preference", "importance": 0.8},
+                {"content": "東京在住", "memory_type": "fact", "importance": 0.7},
+            ],
+        }
+
+        memory._promote_to_mid_term()
+
+        memory.long_term.save.assert_not_called()
+        memory.long_term.save_many.assert_called_once()
+        entries = memory.long_term.save_many.call_args.args[0]
+        assert [e["content"] for e in entries] == ["猫が好き", "東京在住"]
+        assert all(e["source_mid_term_id"] == "m1" for e in entries)
+        memory.short_term.clear.assert_called_once()
@@ -7,6 +7,13 @@ def test_emotion_state_clamping():
     assert emo.arousal == -10.0
     assert emo.dominance == 0.0
 
+def test_emotion_state_clamp_rounds_to_centi_units():
+    emo = EmotionState(pleasure=0.1 + 0.2, arousal=9.999, dominance=-0.004)
+    emo.clamp()
+    assert emo.pleasure == 0.3
+    assert emo.arousal == 10.0
+    assert emo.dominance == 0.0
+
 def test_emotion_state_decay():
     emo = EmotionState(pleasure=10.0, arousal=10.0, dominance=10.0)
     emo.decay(rate=1.0) # decay factor 0.1
@@ -14,6 +21,15 @@ def test_emotion_state_decay():
     assert emo.arousal == 9.0
     assert emo.dominance == 10.0 # dominance is not decayed
 
+def test_emotion_state_decay_reaches_zero_for_small_values():
+    emo = EmotionState(pleasure=0.5, arousal=-0.3, dominance=0.2)
+    for _ in range(50):
+        emo.clamp()
+        emo.decay(rate=0.1)  # decay factor 0.99
+    assert emo.pleasure == 0.0
+    assert emo.arousal == 0.0
+    assert emo.dominance == 0.2
+
 def test_user_state_serialization():
     user_id = "test_user"
     state = UserState.new(user_id)
@@ -29,3 +45,33 @@ def test_user_state_serialization():
     assert restored.user_id == user_id
     assert restored.emotion.pleasure == 5.0
     assert restored.scenario.current_phase == "phase_2"
+
+def test_user_state_to_dict_matches_asdict_and_copies_containers():
+    from dataclasses import asdict
+
+    state = UserState.new("test_user")
+    state.scenario.variables["met"] = True
+    state.current_context_memories.append("駅前で会った")
+
+    data = state.to_dict()
+    assert data == asdict(state)
+
+    data["scenario"]["variables"]["met"] = False
+    data["current_context_memories"].clear()
+    assert state.scenario.variables == {"met": True}
+    assert state.current_context_memories == ["駅前で会った"]
+
+def test_user_state_clone_is_independent():
+    state = UserState.new("test_user")
+    state.emotion.pleasure = 3.0
+    state.scenario.variables["met"] = True
+
+    copy = state.clone()
+    assert copy == state
+
+    copy.emotion.pleasure = -1.0
+    copy.scenario.variables["met"] = False
+    copy.current_context_memories.append("x")
+    assert state.emotion.pleasure == 3.0
+    assert state.scenario.variables == {"met": True}
+    assert state.current_context_memories == []
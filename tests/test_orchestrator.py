@@ -31,4 +31,4 @@ def test_process_chat_turn_legacy_flow(mock_db, mock_subsystems):
     assert result["reply"] == "Mock Reply"
     assert mock_observe.called
     assert mock_actor.called
-    assert mock_mem.save_memory.call_count == 2 # User + Assistant
+    assert mock_mem.enqueue_save.call_count == 2 # User + Assistant
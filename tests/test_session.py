@@ -0,0 +1,30 @@
+from orchestration.session import Session
+
+
+def test_duplicate_submit_shares_claim():
+    session = Session(user_id="u1")
+    claim, duplicate = session.claim_message("hi")
+    assert duplicate is False
+
+    again, duplicate = session.claim_message("hi")
+    assert duplicate is True
+    assert again is claim
+
+    session.finish_message(claim, {"reply": "hello"})
+    assert session.wait_duplicate(again) == {"reply": "hello"}
+
+
+def test_finish_after_newer_claim_does_not_leak_result():
+    session = Session(user_id="u1")
+    claim_a, _ = session.claim_message("hi")
+    claim_b, _ = session.claim_message("yo")
+
+    # A が B より後に完了しても、B の二重送信には A の返信を返さない
+    session.finish_message(claim_a, {"reply": "for hi"})
+    dup_b, duplicate = session.claim_message("yo")
+    assert duplicate is True
+    assert dup_b is claim_b
+    assert not claim_b.done.is_set()
+
+    session.finish_message(claim_b, {"reply": "for yo"})
+    assert session.wait_duplicate(dup_b) == {"reply": "for yo"}
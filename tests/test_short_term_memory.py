@@ -0,0 +1,179 @@
+"""短期記憶のメッセージキャッシュのテスト"""
+import pytest
+from unittest.mock import ANY, MagicMock, patch
+
+
+@pytest.fixture
+def mock_supabase():
+    """Supabaseクライアントのモック"""
+    with patch("orchestration.memory.short_term.get_supabase") as mock:
+        client = MagicMock()
+        mock.return_value = client
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_turn_cache():
+    from orchestration.memory.short_term import _turn_cache
+    _turn_cache.clear()
+    yield
+    _turn_cache.clear()
+
+
+def _select_chain(client):
+    return client.table.return_value.select.return_value.eq.return_value.eq.return_value \
+        .order.return_value.order.return_value.limit.return_value.execute
+
+
+def test_new_session_does_not_read_messages_from_db(mock_supabase):
+    """新規セッションはDBを読まずにキャッシュから返す"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    memory = ShortTermMemory(user_id="u1")
+    memory.add_message("user", "こんにちは")
+    memory.add_message("assistant", "やっほー")
+
+    messages = memory.get_messages()
+
+    assert messages == [
+        {"role": "user", "content": "こんにちは"},
+        {"role": "assistant", "content": "やっほー"},
+    ]
+    _select_chain(mock_supabase).assert_not_called()
+
+
+def test_existing_session_loads_once_and_appends(mock_supabase):
+    """既存セッションは初回のみDBから読み込み、以降は追記分を反映する"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    mock_supabase.table.return_value.select.return_value.eq.return_value.eq.return_value \
+        .order.return_value.limit.return_value.execute.return_value = MagicMock(data=[{"turn_number": 1}])
+    # DBは新しい順で返す
+    _select_chain(mock_supabase).return_value = MagicMock(data=[
+        {"role": "assistant", "content": "b"},
+        {"role": "user", "content": "a"},
+    ])
+
+    memory = ShortTermMemory(user_id="u1", session_id="s1")
+    assert memory.get_messages() == [
+        {"role": "user", "content": "a"},
+        {"role": "assistant", "content": "b"},
+    ]
+
+    memory.add_message("user", "c")
+    assert memory.get_messages(limit=1) == [
+        {"role": "assistant", "content": "b"},
+        {"role": "user", "content": "c"},
+    ]
+    assert _select_chain(mock_supabase).call_count == 1
+
+
+def test_clear_resets_cache(mock_supabase):
+    """クリア後はキャッシュも空になる"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    memory = ShortTermMemory(user_id="u1")
+    memory.add_message("user", "こんにちは")
+    memory.clear()
+
+    assert memory.get_messages() == []
+    assert memory.current_turn == 0
+
+
+def _turn_chain(client):
+    return client.table.return_value.select.return_value.eq.return_value.eq.return_value \
+        .order.return_value.limit.return_value.execute
+
+
+def test_new_session_skips_turn_lookup(mock_supabase):
+    """新規セッションはターン番号をDBに問い合わせない"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    memory = ShortTermMemory(user_id="u1")
+
+    assert memory.current_turn == 0
+    _turn_chain(mock_supabase).assert_not_called()
+
+
+def test_existing_session_turn_is_cached(mock_supabase):
+    """同じセッションの2回目以降はキャッシュからターン番号を得る"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    _turn_chain(mock_supabase).return_value = MagicMock(data=[{"turn_number": 3}])
+
+    first = ShortTermMemory(user_id="u1", session_id="s1")
+    first.add_message("user", "a")
+    second = ShortTermMemory(user_id="u1", session_id="s1")
+
+    assert second.current_turn == 4
+    assert _turn_chain(mock_supabase).call_count == 1
+
+
+def test_add_message_batches_inserts_in_background(mock_supabase):
+    """user/assistant の保存はバックグラウンドで1回のINSERTにまとめられる"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    with patch("orchestration.memory.short_term.WRITE_BATCH_WAIT_SEC", 0.2):
+        memory = ShortTermMemory(user_id="u1")
+        assert memory.add_message("user", "a") == 1
+        memory.add_message("assistant", "b")
+        memory.flush()
+
+    insert = mock_supabase.table.return_value.insert
+    insert.assert_called_once()
+    rows = insert.call_args.args[0]
+    assert rows == [
+        {"user_id": "u1", "role": "user", "content": "a", "turn_number": 1,
+         "session_id": memory.session_id, "created_at": ANY},
+        {"user_id": "u1", "role": "assistant", "content": "b", "turn_number": 1,
+         "session_id": memory.session_id, "created_at": ANY},
+    ]
+    assert rows[0]["created_at"] <= rows[1]["created_at"]
+
+
+def test_failed_batch_insert_falls_back_to_single_rows(mock_supabase):
+    """一括INSERTが失敗し続けたら1行ずつ書き込み、失敗した行だけを破棄する"""
+    from orchestration.memory.short_term import ShortTermMemory
+
+    def execute_for(rows):
+        result = MagicMock()
+        if isinstance(rows, list) or rows["content"] == "bad":
+            result.execute.side_effect = RuntimeError("insert failed")
+        return result
+
+    insert = mock_supabase.table.return_value.insert
+    insert.side_effect = execute_for
+
+    with patch("orchestration.memory.short_term.WRITE_BATCH_WAIT_SEC", 0.2), \
+            patch("orchestration.memory.short_term.WRITE_RETRY_DELAY_SEC", 0):
+        memory = ShortTermMemory(user_id="u1")
+        memory.add_message("user", "a")
+        memory.add_message("assistant", "bad")
+        memory.flush()
+
+    calls = [c.args[0] for c in insert.call_args_list]
+    # 一括INSERT 2回（再試行を含む）のあと、1行ずつ
+    assert [len(c) for c in calls[:2]] == [2, 2]
+    assert [c["content"] for c in calls[2:]] == ["a", "bad"]
+
+
+def test_flush_waits_only_for_own_session(mock_supabase):
+    """他セッションの書き込みが詰まっていても、自セッションの flush は待たない"""
+    import threading
+    from orchestration.memory.short_term import ShortTermMemory
+
+    release = threading.Event()
+    blocked = MagicMock()
+    blocked.table.return_value.insert.return_value.execute.side_effect = lambda: release.wait(5)
+
+    busy = ShortTermMemory(user_id="u1", supabase=blocked)
+    busy.add_message("user", "a")
+    idle = ShortTermMemory(user_id="u2")
+
+    finished = threading.Event()
+    threading.Thread(target=lambda: (idle.flush(), finished.set())).start()
+    try:
+        assert finished.wait(1)
+    finally:
+        release.set()
+        busy.flush()
@@ -37,3 +37,14 @@ def test_reset_user(mock_db):
     storage.reset_user(user_id)
     assert storage.fetch_state(user_id) is None
     assert len(storage.fetch_history(user_id)) == 0
+
+def test_fetch_state_and_history(mock_db):
+    user_id = "user_both"
+    storage.update_state(user_id, models.UserState.new(user_id))
+    storage.append_log(user_id, "user", "Hello")
+
+    state, history = storage.fetch_state_and_history(user_id)
+    assert state is not None and state.user_id == user_id
+    assert [h["content"] for h in history] == ["Hello"]
+
+    assert storage.fetch_state_and_history("non_existent") == (None, [])
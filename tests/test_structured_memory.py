@@ -24,6 +24,14 @@ def mock_supabase():
         yield client
 
 
+@pytest.fixture(autouse=True)
+def clear_profile_cache():
+    from orchestration.memory.structured import _profile_cache
+    _profile_cache.clear()
+    yield
+    _profile_cache.clear()
+
+
 @pytest.fixture
 def manager(mock_supabase):
     """StructuredMemoryManagerのインスタンス"""
@@ -52,7 +60,7 @@ class TestUserProfile:
 
     def test_get_profile_returns_dataclass(self, manager, mock_supabase):
         """プロフィール取得でUserProfileが返る"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = MagicMock(
+        mock_supabase.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute.return_value = MagicMock(
             data={
                 "user_id": "test_user_123",
                 "name": "太郎",
@@ -74,7 +82,7 @@ class TestUserProfile:
 
     def test_get_profile_empty_returns_default(self, manager, mock_supabase):
         """プロフィールがない場合はデフォルト値"""
-        mock_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = MagicMock(data=None)
+        mock_supabase.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute.return_value = None
 
         from orchestration.memory.structured import UserProfile
         profile = manager.get_profile()
@@ -85,7 +93,7 @@ class TestUserProfile:
     def test_save_profile_hobby_appends(self, manager, mock_supabase):
         """趣味は追加される"""
         # 既存データ
-        mock_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = MagicMock(
+        mock_supabase.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute.return_value = MagicMock(
             data={"hobbies": ["ゲーム"]}
         )
         mock_supabase.table.return_value.upsert.return_value.execute.return_value = MagicMock(data=[{}])
@@ -221,6 +229,20 @@ class TestBoundary:
 
         assert result is None
 
+    def test_check_boundary_prefers_higher_severity(self, manager, mock_supabase):
+        """複数該当する場合は重要度の高いものを返し、一覧の取得は1回だけ"""
+        select = mock_supabase.table.return_value.select.return_value.eq.return_value.order.return_value.execute
+        select.return_value = MagicMock(
+            data=[
+                {"id": "1", "content": "仕事", "category": "topic", "severity": 0.9, "created_at": "2025-01-01"},
+                {"id": "2", "content": "元カノ", "category": "topic", "severity": 0.5, "created_at": "2025-01-01"},
+            ]
+        )
+
+        assert manager.check_boundary("元カノと仕事の話").id == "1"
+        assert manager.check_boundary("元カノの話").id == "2"
+        assert select.call_count == 1
+
 
 class TestIntegrationWithClassifier:
     """発話分類との連携テスト"""
@@ -293,3 +315,42 @@ class TestIntegrationWithClassifier:
         # 何も保存されない
         mock_supabase.table.return_value.upsert.assert_not_called()
         mock_supabase.table.return_value.insert.assert_not_called()
+
+    def test_process_profile_saves_fields_in_one_upsert(self, manager, mock_supabase):
+        """複数フィールドでもプロフィールの取得・upsertは1回ずつ"""
+        mock_supabase.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute.return_value = MagicMock(
+            data={"user_id": "test_user_123", "hobbies": ["読書"]}
+        )
+
+        from orchestration.utterance_classifier import ClassificationResult, UtteranceCategory
+
+        classification = ClassificationResult(
+            category=UtteranceCategory.PROFILE,
+            confidence=0.9,
+            extracted_info={"name": "花子", "age": 20, "hobby": "料理", "like": "猫"},
+            reasoning=""
+        )
+
+        manager.process_classification(classification)
+
+        mock_supabase.table.return_value.select.assert_called_once()
+        mock_supabase.table.return_value.upsert.assert_called_once()
+        saved = mock_supabase.table.return_value.upsert.call_args.args[0]
+        assert saved["name"] == "花子"
+        assert saved["age"] == 20
+        assert saved["hobbies"] == ["読書", "料理", "猫"]
+
+    def test_profile_is_cached_between_saves(self, manager, mock_supabase):
+        """一度読んだプロフィールは再取得せず、保存内容もキャッシュに反映される"""
+        select = mock_supabase.table.return_value.select.return_value.eq.return_value.maybe_single.return_value.execute
+        select.return_value = MagicMock(data={"user_id": "test_user_123", "hobbies": []})
+
+        manager.save_profile("hobby", "読書")
+        manager.save_profile("hobby", "料理")
+
+        assert select.call_count == 1
+        assert manager.get_profile().hobbies == ["読書", "料理"]
+
+        manager.reload()
+        manager.get_profile()
+        assert select.call_count == 2